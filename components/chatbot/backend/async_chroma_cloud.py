@@ -0,0 +1,117 @@
+"""
+Asyncio counterpart of the Chroma Cloud client.
+
+Built for evaluation and cache pre-warming jobs that run thousands of queries:
+embeddings are packed into multi-embedding /query requests and the requests
+run concurrently under a semaphore, on top of the pooled ChromaCloudClient
+session (so no extra HTTP dependency is needed). With CHROMA_ACCESS_SHARDING
+on it wraps a ShardedChromaClient, like get_store(). Full-size query
+embeddings are projected like the retriever's when a PCA projection is
+published (see projection.py).
+"""
+
+import asyncio
+from typing import List, Optional
+
+from chroma_cloud import ChromaCloudClient, ShardedChromaClient, CHROMA_ACCESS_SHARDING, CHROMA_COLLECTION
+from projection import project_query
+
+# Embeddings packed into a single /query request
+QUERY_BATCH_SIZE = 32
+
+# Requests in flight at once
+QUERY_CONCURRENCY = 8
+
+# Keys of a Chroma query response that hold one row per query embedding
+RESULT_KEYS = ("ids", "documents", "metadatas", "distances", "embeddings")
+
+
+class AsyncChromaCloudClient:
+    """Async Chroma Cloud client with multi-query batching"""
+
+    def __init__(
+        self,
+        collection: str = CHROMA_COLLECTION,
+        batch_size: int = QUERY_BATCH_SIZE,
+        max_concurrency: int = QUERY_CONCURRENCY,
+        client=None,
+    ):
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        # One pooled connection per concurrent request
+        if client is None:
+            store = ShardedChromaClient if CHROMA_ACCESS_SHARDING else ChromaCloudClient
+            client = store(collection, pool_size=max_concurrency)
+        self.client = client
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        await asyncio.to_thread(self.client.close)
+
+    async def query_similar(
+        self,
+        query_embedding: List[float],
+        n_results: int = 4,
+        where: Optional[dict] = None
+    ) -> dict:
+        """Query a single embedding"""
+        query_embedding = project_query(query_embedding)
+        return await asyncio.to_thread(self.client.query_similar, query_embedding, n_results, where)
+
+    async def query_many(
+        self,
+        embeddings: List[List[float]],
+        n_results: int = 4,
+        where: Optional[dict] = None
+    ) -> dict:
+        """
+        Query many embeddings at once.
+
+        Returns a single Chroma-shaped response with one row per input
+        embedding, in input order.
+        """
+        if not len(embeddings):
+            return {key: [] for key in RESULT_KEYS}
+
+        # Resolve the collection IDs once so concurrent requests share the cache
+        # (without creating anything: a missing collection just has no matches)
+        await asyncio.to_thread(self._resolve_collections)
+
+        # Stored vectors may be PCA-reduced
+        embeddings = [project_query(embedding) for embedding in embeddings]
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(batch: List[List[float]]) -> dict:
+            async with semaphore:
+                return await asyncio.to_thread(self.client.query_batch, batch, n_results, where)
+
+        batches = [
+            list(embeddings[i:i + self.batch_size])
+            for i in range(0, len(embeddings), self.batch_size)
+        ]
+        responses = await asyncio.gather(*(run(batch) for batch in batches))
+
+        return merge_query_results(responses)
+
+    def _resolve_collections(self):
+        if isinstance(self.client, ShardedChromaClient):
+            for access_level in self.client.access_levels:
+                self.client.shard(access_level).get_collection_id()
+        else:
+            self.client.get_collection_id()
+
+
+def merge_query_results(responses: List[dict]) -> dict:
+    """Concatenate the per-query rows of several Chroma query responses"""
+    merged = {key: [] for key in RESULT_KEYS}
+    for response in responses:
+        rows = len(response.get("ids") or [])
+        for key in RESULT_KEYS:
+            merged[key].extend(response.get(key) or [None] * rows)
+    return merged
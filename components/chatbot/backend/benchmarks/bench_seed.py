@@ -0,0 +1,202 @@
+"""
+Offline benchmark for the seeding pipeline
+
+Starts stand-in Chroma and HuggingFace servers (see standin_servers.py), then
+runs seed_to_chroma_cloud end to end against them over synthetic corpora of
+increasing size. Each run happens in a fresh subprocess so peak RSS is
+measured per corpus size.
+
+Usage:
+    python benchmarks/bench_seed.py
+    python benchmarks/bench_seed.py --sizes 100 1000 10000 --latency 0.05 --throttle-rate 0.02
+    python benchmarks/bench_seed.py --json results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+
+sys.path.insert(0, str(BENCH_DIR))
+
+WORDS = (
+    "sharematch asset index trade buy sell portfolio wallet deposit withdraw kyc "
+    "verification account login signup password email whatsapp otp market price "
+    "units order confirm terms risk season team league performance token"
+).split()
+
+
+def synthetic_records(count: int, chunk_size: int = 1000, seed: int = 0):
+    """Yield seeder-shaped records with roughly chunk_size characters of text"""
+    from embedding_cache import content_hash
+
+    rng = random.Random(seed)
+    for i in range(count):
+        words = []
+        length = 0
+        while length < chunk_size:
+            word = rng.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        text = " ".join(words)
+        yield {
+            "id": f"faq_chunk_{i}",
+            "document": text,
+            "metadata": {
+                "source": "synthetic.pdf",
+                "type": "text",
+                "page": i // 4,
+                "chunk_index": i,
+                "access_level": "public",
+                "content_hash": content_hash(text),
+            },
+        }
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_child(args):
+    """Seed a synthetic corpus against the stand-ins (runs in a subprocess)"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    # Removed with everything the seeder wrote there once the run ends
+    with tempfile.TemporaryDirectory(prefix="bench_seed_") as tmp:
+        workdir = Path(tmp)
+
+        # Keep the seeder's progress output off stdout, which carries the result
+        with contextlib.redirect_stdout(sys.stderr if args.verbose else open(os.devnull, "w")):
+            import query_cache
+            import seed_to_chroma_cloud as seeder
+
+            # Keep checkpoints, projections and cache invalidation away from the real CHROMA_DIR
+            seeder.CHECKPOINT_PATH = workdir / "seed_checkpoint.json"
+            seeder.PROJECTION_PATH = workdir / "projection.npz"
+            seeder.PENDING_PROJECTION_PATH = workdir / "projection.pending.npz"
+            seeder.bump_collection_version = lambda: query_cache.bump_collection_version(workdir / "collection.version")
+            seeder.iter_records = lambda: synthetic_records(args.docs)
+            seeder.refresh_answer_index = lambda: None
+
+            started = time.perf_counter()
+            exit_code = 0
+            try:
+                seeder.main(["--no-cache"])
+            except SystemExit as e:
+                exit_code = e.code or 0
+            seconds = time.perf_counter() - started
+
+    print(json.dumps({
+        "docs": args.docs,
+        "seconds": round(seconds, 3),
+        "docs_per_sec": round(args.docs / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "exit_code": exit_code,
+    }))
+
+
+def run_benchmark(args) -> list:
+    from standin_servers import ChromaStandIn, EmbeddingStandIn, FaultProfile
+
+    chroma = ChromaStandIn(FaultProfile(
+        latency=args.latency, jitter=args.latency / 2,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=1,
+    )).start()
+    embedder = EmbeddingStandIn(FaultProfile(
+        latency=args.embed_latency, jitter=args.embed_latency / 2,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate, seed=2,
+    )).start()
+
+    env = dict(
+        os.environ,
+        CHROMA_API_BASE=chroma.api_base,
+        CHROMA_API_KEY="bench",
+        CHROMA_COLLECTION="bench_collection",
+        HF_INFERENCE_BASE=embedder.url,
+        HF_TOKEN="bench",
+        EMBEDDING_BACKEND="http",
+        EMBEDDING_RATE_LIMIT=str(args.rate_limit),
+        EMBEDDING_WORKERS=str(args.workers),
+    )
+
+    results = []
+    try:
+        for size in args.sizes:
+            chroma.reset()
+            embedder.reset_stats()
+
+            command = [sys.executable, __file__, "--child", "--docs", str(size)]
+            if args.verbose:
+                command.append("--verbose")
+            completed = subprocess.run(command, env=env, capture_output=True, text=True)
+            if completed.returncode != 0 or not completed.stdout.strip():
+                print(completed.stderr, file=sys.stderr)
+                raise Exception(f"Benchmark run for {size} docs failed")
+
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            result["chroma"] = chroma.stats()
+            result["embedding"] = embedder.stats()
+            result["stored"] = sum(len(store) for store in chroma.records.values())
+            results.append(result)
+            print_result(result)
+    finally:
+        chroma.stop()
+        embedder.stop()
+
+    return results
+
+
+def print_result(result: dict):
+    c, e = result["chroma"], result["embedding"]
+    print(
+        f"{result['docs']:>7} docs  {result['seconds']:>8.2f}s  {result['docs_per_sec']:>8} docs/s  "
+        f"rss {result['peak_rss_mb']:>7.1f} MB  stored {result['stored']:>7}  exit {result['exit_code']}\n"
+        f"        chroma    {c['requests']:>6} req  p50 {c.get('p50_ms', 0):>7} ms  "
+        f"p95 {c.get('p95_ms', 0):>7} ms  p99 {c.get('p99_ms', 0):>7} ms  {c['status']}\n"
+        f"        embedding {e['requests']:>6} req  p50 {e.get('p50_ms', 0):>7} ms  "
+        f"p95 {e.get('p95_ms', 0):>7} ms  p99 {e.get('p99_ms', 0):>7} ms  {e['status']}"
+    )
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark seed_to_chroma_cloud against local stand-in servers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000], help="Synthetic corpus sizes")
+    parser.add_argument("--latency", type=float, default=0.02, help="Chroma stand-in latency (seconds)")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Embedding stand-in latency (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-limit", type=float, default=1000.0, help="EMBEDDING_RATE_LIMIT for the run")
+    parser.add_argument("--workers", type=int, default=4, help="EMBEDDING_WORKERS for the run")
+    parser.add_argument("--json", type=Path, help="Write results to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show seeder output")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--docs", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        run_child(args)
+        return
+
+    print(f"🏁 Benchmarking seeding over {args.sizes} synthetic documents")
+    results = run_benchmark(args)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
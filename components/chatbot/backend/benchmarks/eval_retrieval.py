@@ -0,0 +1,211 @@
+"""
+Offline retrieval quality / latency evaluation over chunking parameters
+
+For every CHUNK_SIZE x CHUNK_OVERLAP combination in the grid, rebuilds the
+corpus records (PDF pages come from the parsed-text cache, which is read but
+never written, so only splitting is redone), embeds them through the on-disk
+embedding cache, writes an in-process local index (see local_index.py) and
+runs the labeled questions against it for every k. Nothing is uploaded to
+Chroma.
+
+Reports recall@k (questions with at least one expected source in the top k),
+MRR@k, chunk count, index size on disk, the context the LLM would receive
+(approximate tokens) and per-query search latency (embedding excluded).
+
+The questions file is JSONL, one {"question", "expected"} object per line.
+"expected" lists what counts as a correct hit: a record ID ("video_login"),
+a source file ("faq.pdf") or a source page ("faq.pdf:1", 0-based like the
+stored page metadata).
+
+Usage:
+    python benchmarks/eval_retrieval.py
+    python benchmarks/eval_retrieval.py --chunk-sizes 500 1000 --overlaps 0 150 -k 2 4 --min-recall 0.9
+    python benchmarks/eval_retrieval.py --questions my_questions.jsonl --json results.json
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+BACKEND_DIR = BENCH_DIR.parent
+
+sys.path.insert(0, str(BACKEND_DIR))
+
+DEFAULT_QUESTIONS = BENCH_DIR / "eval_questions.jsonl"
+
+# Rough characters per token for the context size estimate
+CHARS_PER_TOKEN = 4
+
+
+def load_questions(path: Path) -> list:
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if not item.get("question") or not item.get("expected"):
+                raise Exception(f"{path}:{number}: expected {{\"question\", \"expected\"}}")
+            questions.append(item)
+    return questions
+
+
+def is_relevant(doc_id: str, metadata: dict, expected: set) -> bool:
+    """Does a retrieved record match any expected ID, source or source:page?"""
+    source = metadata.get("source")
+    if doc_id in expected or source in expected:
+        return True
+    # Merged near-duplicates stand in for the pages they were dropped from
+    pages = [metadata.get("page")] + str(metadata.get("duplicate_pages") or "").split(",")
+    return any(f"{source}:{page}" in expected for page in pages if page not in (None, ""))
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def index_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in path.iterdir() if f.is_file())
+
+
+def evaluate_config(chunk_size, chunk_overlap, ks, questions, query_vectors, embed, dtype, workdir) -> list:
+    """Build the index for one chunking setting and score it for every k"""
+    from local_index import LocalIndex
+    from records import iter_records
+
+    # Read-only: the grid must not replace the seeder's cached chunks
+    records = list(iter_records(chunk_size=chunk_size, chunk_overlap=chunk_overlap, update_cache=False))
+    embeddings = embed([r["document"] for r in records])
+
+    index = LocalIndex(workdir / f"{chunk_size}_{chunk_overlap}")
+    index.write(
+        [r["id"] for r in records], [r["document"] for r in records], embeddings,
+        [r["metadata"] for r in records], dtype=dtype,
+    )
+    index.load()
+
+    rows = []
+    for k in ks:
+        index.query_similar(query_vectors[0], k)  # warm up the memory map
+        hits, reciprocal_ranks, latencies, context_chars = 0, [], [], []
+        for item, vector in zip(questions, query_vectors):
+            started = time.perf_counter()
+            result = index.query_similar(vector, k)
+            latencies.append(time.perf_counter() - started)
+
+            expected = set(item["expected"])
+            matches = result["ids"][0], result["metadatas"][0]
+            rank = next((i for i, (doc_id, metadata) in enumerate(zip(*matches), 1)
+                         if is_relevant(doc_id, metadata, expected)), None)
+            hits += rank is not None
+            reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+            context_chars.append(sum(len(doc) for doc in result["documents"][0]))
+
+        rows.append({
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "k": k,
+            "recall": round(hits / len(questions), 4),
+            "mrr": round(sum(reciprocal_ranks) / len(questions), 4),
+            "chunks": len(records),
+            "index_bytes": index_size(index.path),
+            "context_tokens": round(sum(context_chars) / len(context_chars) / CHARS_PER_TOKEN),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        })
+    return rows
+
+
+def run_evaluation(args) -> list:
+    from embedding_cache import EmbeddingCache
+    from embeddings import get_embedder
+
+    questions = load_questions(args.questions)
+    embedder = get_embedder()
+    cache = EmbeddingCache()
+
+    def embed(texts):
+        return cache.embed(texts, embedder.embed)
+
+    results = []
+    try:
+        query_vectors = embed([item["question"] for item in questions])
+        with tempfile.TemporaryDirectory(prefix="eval_retrieval_") as workdir:
+            for chunk_size in args.chunk_sizes:
+                for chunk_overlap in args.overlaps:
+                    if chunk_overlap >= chunk_size:
+                        continue
+                    rows = evaluate_config(
+                        chunk_size, chunk_overlap, sorted(args.k), questions, query_vectors,
+                        embed, args.dtype, Path(workdir),
+                    )
+                    for row in rows:
+                        print_row(row)
+                    results.extend(rows)
+    finally:
+        embedder.close()
+        cache.close()
+
+    print(f"\n💾 Embedding cache: {cache.hits} hits, {cache.misses} misses")
+    return results
+
+
+def print_row(row: dict):
+    print(
+        f"size {row['chunk_size']:>5}  overlap {row['chunk_overlap']:>4}  k {row['k']:>2}  "
+        f"recall {row['recall']:.3f}  mrr {row['mrr']:.3f}  chunks {row['chunks']:>5}  "
+        f"index {row['index_bytes'] / 1024:>8.1f} KB  context ~{row['context_tokens']:>5} tok  "
+        f"p50 {row['p50_ms']:>7.3f} ms  p95 {row['p95_ms']:>7.3f} ms"
+    )
+
+
+def best_config(results: list, min_recall: float):
+    """Smallest context, then fastest, among the configs reaching min_recall"""
+    acceptable = [r for r in results if r["recall"] >= min_recall]
+    if not acceptable:
+        return None
+    return min(acceptable, key=lambda r: (r["context_tokens"], r["p50_ms"], -r["mrr"]))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency over chunking settings")
+    parser.add_argument("--questions", type=Path, default=DEFAULT_QUESTIONS,
+                        help="JSONL file of {\"question\", \"expected\"} objects")
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, 750, 1000, 1500])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 150, 300])
+    parser.add_argument("-k", type=int, nargs="+", default=[2, 4, 6, 8], help="Numbers of results to score")
+    parser.add_argument("--dtype", choices=["float32", "float16", "int8"], default="float32",
+                        help="Storage type of the index vectors")
+    parser.add_argument("--min-recall", type=float, default=0.9,
+                        help="Recall the suggested configuration must reach")
+    parser.add_argument("--json", type=Path, help="Write results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print(f"🏁 Evaluating {args.questions.name} over chunk sizes {args.chunk_sizes}, "
+          f"overlaps {args.overlaps}, k {args.k}")
+    results = run_evaluation(args)
+
+    best = best_config(results, args.min_recall)
+    if best:
+        print(f"\n🏆 Smallest context with recall >= {args.min_recall}: CHUNK_SIZE={best['chunk_size']} "
+              f"CHUNK_OVERLAP={best['chunk_overlap']} k={best['k']} "
+              f"(recall {best['recall']:.3f}, mrr {best['mrr']:.3f}, ~{best['context_tokens']} tokens)")
+    else:
+        print(f"\n⚠️ No configuration reached recall {args.min_recall}")
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"💾 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Local stand-in HTTP servers for benchmarking the chatbot backend offline
+
+- ChromaStandIn mimics the Chroma Cloud v2 endpoints used by chroma_cloud.py
+  (collection lookup/create/delete, add, upsert, get, query, delete, count)
+- EmbeddingStandIn mimics the HuggingFace feature-extraction endpoint used by
+  embeddings.py, returning deterministic pseudo-random 384-dim vectors
+
+Both inject configurable latency, 5xx errors and 429s, and record the
+latency of every request they serve.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from itertools import islice
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+class FaultProfile:
+    """Latency and failure injection for a stand-in server"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 0.1,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self):
+        """Returns (delay seconds, injected status or None)"""
+        with self._lock:
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 500
+        return delay, None
+
+
+class StandInServer:
+    """Threaded HTTP server running in the background with request stats"""
+
+    def __init__(self, faults: FaultProfile = None, host: str = "127.0.0.1", port: int = 0):
+        self.faults = faults or FaultProfile()
+        self.latencies = []
+        self.status_counts = {}
+        self._stats_lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self):
+                started = time.perf_counter()
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                delay, injected = server.faults.draw()
+                if delay:
+                    time.sleep(delay)
+
+                headers = {}
+                if injected == 429:
+                    status, payload = 429, {"error": "rate limited"}
+                    headers["Retry-After"] = str(server.faults.retry_after)
+                elif injected:
+                    status, payload = injected, {"error": "injected failure"}
+                else:
+                    try:
+                        status, payload = server.route(self.command, self.path, json.loads(body) if body else None)
+                    except Exception as e:
+                        status, payload = 500, {"error": str(e)}
+
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+                server.record(status, time.perf_counter() - started)
+
+            do_GET = _handle
+            do_POST = _handle
+            do_DELETE = _handle
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def record(self, status: int, seconds: float):
+        with self._stats_lock:
+            self.latencies.append(seconds)
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.latencies = []
+            self.status_counts = {}
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            latencies = np.asarray(self.latencies, dtype=np.float64) * 1000
+            counts = dict(self.status_counts)
+        if not len(latencies):
+            return {"requests": 0, "status": counts}
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        return {
+            "requests": int(len(latencies)),
+            "status": counts,
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2),
+        }
+
+    def route(self, method: str, path: str, body):
+        raise NotImplementedError
+
+
+class ChromaStandIn(StandInServer):
+    """In-memory stand-in for the Chroma Cloud v2 REST API"""
+
+    API_PREFIX = "/api/v2"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+        self.collections = {}  # name -> id
+        self.records = {}      # collection id -> {doc id -> (document, embedding, metadata)}
+
+    @property
+    def api_base(self) -> str:
+        return f"{self.url}{self.API_PREFIX}"
+
+    def reset(self):
+        with self._lock:
+            self.collections = {}
+            self.records = {}
+        self.reset_stats()
+
+    def load_snapshot(self, path, name: str) -> str:
+        """Preload a collection from a chroma_cloud snapshot, returns its ID"""
+        from chroma_cloud import read_snapshot
+
+        snapshot = read_snapshot(path)
+        with self._lock:
+            collection_id = self.collections.setdefault(name, uuid.uuid4().hex)
+            self.records[collection_id] = {
+                doc_id: (document, embedding, metadata)
+                for doc_id, document, embedding, metadata in zip(
+                    snapshot["ids"], snapshot["documents"], snapshot["embeddings"].tolist(), snapshot["metadatas"]
+                )
+            }
+        return collection_id
+
+    def route(self, method: str, path: str, body):
+        match = re.match(rf"{self.API_PREFIX}/tenants/[^/]+/databases/[^/]+/collections(?:/([^/]+))?(?:/(\w+))?$", path)
+        if not match:
+            return 404, {"error": f"unknown path {path}"}
+        name_or_id, action = match.groups()
+
+        with self._lock:
+            if name_or_id is None and method == "POST":
+                collection_id = self.collections.setdefault(body["name"], uuid.uuid4().hex)
+                self.records.setdefault(collection_id, {})
+                return 200, {"id": collection_id, "name": body["name"]}
+
+            if action is None and method == "DELETE":
+                if name_or_id not in self.collections:
+                    return 404, {"error": "collection not found"}
+                self.records.pop(self.collections.pop(name_or_id), None)
+                return 200, {}
+
+            if action is None:
+                if name_or_id in self.collections:
+                    return 200, {"id": self.collections[name_or_id], "name": name_or_id}
+                return 404, {"error": "collection not found"}
+
+            store = self.records.get(name_or_id)
+            if store is None:
+                return 404, {"error": "collection not found"}
+
+            if action in ("add", "upsert"):
+                metadatas = body.get("metadatas") or [{}] * len(body["ids"])
+                # Like Chroma, a collection's dimension is fixed by its first vector
+                dimensions = {len(e) for e in body["embeddings"]} | {len(e) for _, e, _ in islice(store.values(), 1)}
+                if len(dimensions) > 1:
+                    return 400, {"error": f"embedding dimensions {sorted(dimensions)} don't match the collection"}
+                for doc_id, document, embedding, metadata in zip(
+                    body["ids"], body["documents"], body["embeddings"], metadatas
+                ):
+                    store[doc_id] = (document, embedding, metadata)
+                return 200, {}
+
+            if action == "count":
+                return 200, len(store)
+
+            if action == "delete":
+                for doc_id in body.get("ids") or []:
+                    store.pop(doc_id, None)
+                return 200, {}
+
+            if action == "get":
+                return 200, self._get(store, body or {})
+
+            if action == "query":
+                return 200, self._query(store, body)
+
+        return 404, {"error": f"unknown action {action}"}
+
+    @staticmethod
+    def _filtered(store: dict, where):
+        items = list(store.items())
+        if where:
+            items = [
+                (doc_id, record) for doc_id, record in items
+                if all(
+                    (record[2] or {}).get(key) == (value.get("$eq") if isinstance(value, dict) else value)
+                    for key, value in where.items()
+                )
+            ]
+        return items
+
+    def _get(self, store: dict, body: dict) -> dict:
+        items = self._filtered(store, body.get("where"))
+        if body.get("ids") is not None:
+            wanted = set(body["ids"])
+            items = [item for item in items if item[0] in wanted]
+        offset = body.get("offset") or 0
+        limit = body.get("limit")
+        items = items[offset:offset + limit if limit is not None else None]
+
+        include = body.get("include") or []
+        result = {"ids": [doc_id for doc_id, _ in items]}
+        if "documents" in include:
+            result["documents"] = [record[0] for _, record in items]
+        if "embeddings" in include:
+            result["embeddings"] = [record[1] for _, record in items]
+        if "metadatas" in include:
+            result["metadatas"] = [record[2] for _, record in items]
+        return result
+
+    def _query(self, store: dict, body: dict) -> dict:
+        items = self._filtered(store, body.get("where"))
+        n_results = body.get("n_results", 10)
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        if "embeddings" in (body.get("include") or []):
+            result["embeddings"] = []
+        if not items:
+            for _ in body["query_embeddings"]:
+                for key in result:
+                    result[key].append([])
+            return result
+
+        matrix = np.asarray([record[1] for _, record in items], dtype=np.float32)
+        queries = np.asarray(body["query_embeddings"], dtype=np.float32)
+        distances = ((queries[:, None, :] - matrix[None, :, :]) ** 2).sum(axis=2)
+        for row in distances:
+            order = np.argsort(row)[:n_results]
+            result["ids"].append([items[i][0] for i in order])
+            result["documents"].append([items[i][1][0] for i in order])
+            result["metadatas"].append([items[i][1][2] for i in order])
+            result["distances"].append([float(row[i]) for i in order])
+            if "embeddings" in result:
+                result["embeddings"].append([items[i][1][1] for i in order])
+        return result
+
+
+class EmbeddingStandIn(StandInServer):
+    """Stand-in for the HuggingFace feature-extraction endpoint"""
+
+    def __init__(self, *args, dimensions: int = 384, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.dimensions = dimensions
+        self.texts_embedded = 0
+
+    def embed(self, text: str) -> list:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions).astype(np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def route(self, method: str, path: str, body):
+        if method != "POST" or not path.endswith("/pipeline/feature-extraction"):
+            return 404, {"error": f"unknown path {path}"}
+        inputs = body["inputs"]
+        if isinstance(inputs, str):
+            self.texts_embedded += 1
+            return 200, self.embed(inputs)
+        self.texts_embedded += len(inputs)
+        return 200, [self.embed(text) for text in inputs]
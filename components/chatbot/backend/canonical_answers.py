@@ -0,0 +1,279 @@
+"""
+Precomputed retrieval results for canonical questions
+
+Most traffic is a few dozen questions ("how do I sign up?", "is it Sharia
+compliant?"). build_answer_index() embeds the curated questions in
+canonical_questions.json (each with a few paraphrases), retrieves their
+results once and writes a compact artifact to CHROMA_DIR:
+
+- phrasings.npy - normalized float16 embedding per question/paraphrase
+- answers.json  - stored documents (once each), the ranked results per
+                  question and a manifest
+
+lookup_answer() matches a query embedding against the phrasings and, above
+CANONICAL_MATCH_THRESHOLD, returns the stored results without querying the
+vector store. The artifact records the collection version it was built
+against; after a reseed, import, clear or replica export the seeder /
+manage.py refresh it with refresh_answer_index(), which re-retrieves the
+stored phrasings from Chroma Cloud without embedding anything. A stale artifact is skipped with a warning.
+"""
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from config import CANONICAL_MATCH_THRESHOLD, CANONICAL_QUESTIONS_PATH, CHROMA_DIR, EMBEDDING_MODEL
+from local_index import matches_filter
+import metrics
+from query_cache import read_collection_version
+from vectors import normalize_rows
+
+ANSWER_INDEX_DIR = CHROMA_DIR / "canonical_answers"
+PHRASINGS_FILE = "phrasings.npy"
+ANSWERS_FILE = "answers.json"
+ANSWER_INDEX_FORMAT = 1
+
+# Results stored per question; where filters and smaller n_results are served from these
+ANSWER_RESULTS = 8
+
+
+def load_canonical_questions(path: Path = CANONICAL_QUESTIONS_PATH) -> List[dict]:
+    """[{"id", "question", "paraphrases"}] from the curated questions file"""
+    with open(path, "r", encoding="utf-8") as f:
+        questions = json.load(f)
+    for item in questions:
+        if not item.get("id") or not item.get("question"):
+            raise Exception(f"Canonical questions need an id and a question: {item}")
+    return questions
+
+
+class AnswerIndex:
+    """Canonical phrasings -> precomputed Chroma-shaped results"""
+
+    def __init__(self, phrasings: np.ndarray, phrasing_question: List[int], questions: List[dict],
+                 documents: dict, manifest: dict):
+        self.phrasings = phrasings
+        self.phrasing_question = np.asarray(phrasing_question, dtype=np.int64)
+        self.questions = questions    # [{"id", "question", "results": [[doc id, distance], ...]}]
+        self.documents = documents    # doc id -> {"document", "metadata"}
+        self.manifest = manifest
+
+    @classmethod
+    def build(
+        cls,
+        questions: List[dict],
+        embed: Callable[[List[str]], np.ndarray],
+        query_fn: Callable[..., dict],
+        n_results: int = ANSWER_RESULTS,
+    ) -> "AnswerIndex":
+        """
+        Embed every phrasing and retrieve each question's results with
+        query_fn(embedding, n_results) (a vector store query)
+        """
+        texts, owners, first_rows = [], [], []
+        for position, item in enumerate(questions):
+            first_rows.append(len(texts))
+            for text in [item["question"], *item.get("paraphrases", [])]:
+                texts.append(text)
+                owners.append(position)
+
+        vectors = normalize_rows(np.asarray(embed(texts), dtype=np.float32))
+        return cls._retrieve(vectors, owners, questions, first_rows, query_fn, n_results)
+
+    @classmethod
+    def _retrieve(cls, vectors, owners, questions, first_rows, query_fn, n_results) -> "AnswerIndex":
+        # Each question is answered for its canonical wording
+        entries, documents = [], {}
+        for item, row in zip(questions, first_rows):
+            result = query_fn(vectors[row].tolist(), n_results)
+            rows = zip(result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0])
+            entry = {"id": item["id"], "question": item["question"], "results": []}
+            for doc_id, document, metadata, distance in rows:
+                documents.setdefault(doc_id, {"document": document, "metadata": metadata or {}})
+                entry["results"].append([doc_id, distance])
+            entries.append(entry)
+
+        manifest = {
+            "format": ANSWER_INDEX_FORMAT,
+            "model": EMBEDDING_MODEL,
+            "collection_version": read_collection_version(),
+            "questions": len(entries),
+            "phrasings": len(vectors),
+            "results_per_question": n_results,
+            "built_at": time.time(),
+        }
+        return cls(vectors.astype(np.float16), owners, entries, documents, manifest)
+
+    def refresh(self, query_fn: Callable[..., dict]) -> "AnswerIndex":
+        """Same phrasings, results retrieved again (e.g. after a reseed)"""
+        owners = self.phrasing_question.tolist()
+        first_rows = [owners.index(position) for position in range(len(self.questions))]
+        questions = [{"id": item["id"], "question": item["question"]} for item in self.questions]
+        vectors = normalize_rows(self.phrasings.astype(np.float32))
+        return self._retrieve(vectors, owners, questions, first_rows, query_fn, self.manifest["results_per_question"])
+
+    def save(self, path: Path = ANSWER_INDEX_DIR):
+        """Write the artifact; answers.json is replaced last, so readers see old or new"""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        tmp_phrasings = path / f".{PHRASINGS_FILE}.tmp"
+        with open(tmp_phrasings, "wb") as f:
+            np.save(f, self.phrasings)
+
+        tmp_answers = path / f".{ANSWERS_FILE}.tmp"
+        with open(tmp_answers, "w", encoding="utf-8") as f:
+            json.dump({
+                "manifest": self.manifest,
+                "phrasing_question": self.phrasing_question.tolist(),
+                "questions": self.questions,
+                "documents": self.documents,
+            }, f)
+
+        os.replace(tmp_phrasings, path / PHRASINGS_FILE)
+        os.replace(tmp_answers, path / ANSWERS_FILE)
+
+    @classmethod
+    def load(cls, path: Path = ANSWER_INDEX_DIR) -> Optional["AnswerIndex"]:
+        path = Path(path)
+        try:
+            with open(path / ANSWERS_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            phrasings = np.load(path / PHRASINGS_FILE)
+        except FileNotFoundError:
+            return None
+        if data["manifest"].get("format") != ANSWER_INDEX_FORMAT or len(phrasings) != len(data["phrasing_question"]):
+            return None
+        return cls(phrasings, data["phrasing_question"], data["questions"], data["documents"], data["manifest"])
+
+    def size_bytes(self, path: Path = ANSWER_INDEX_DIR) -> int:
+        return sum((Path(path) / name).stat().st_size for name in (PHRASINGS_FILE, ANSWERS_FILE))
+
+    def match(self, query_embedding):
+        """(question index, cosine similarity) of the closest phrasing, or None"""
+        query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+        if not len(self.phrasings) or len(query) != self.phrasings.shape[1]:
+            return None
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return None
+        scores = self.phrasings.astype(np.float32) @ (query / norm)
+        best = int(np.argmax(scores))
+        return int(self.phrasing_question[best]), float(scores[best])
+
+    def lookup(
+        self,
+        query_embedding,
+        n_results: int = 4,
+        where: Optional[dict] = None,
+        threshold: float = CANONICAL_MATCH_THRESHOLD,
+    ) -> Optional[dict]:
+        """
+        Precomputed results for the matching canonical question, shaped like
+        a Chroma query response, or None (no match, or too few stored results
+        pass the where filter). Distances are the canonical question's.
+        """
+        match = self.match(query_embedding)
+        if match is None or match[1] < threshold or n_results > self.manifest["results_per_question"]:
+            return None
+
+        hits = []
+        for doc_id, distance in self.questions[match[0]]["results"]:
+            stored = self.documents[doc_id]
+            if where and not matches_filter(stored["metadata"], where):
+                continue
+            hits.append((doc_id, stored, distance))
+            if len(hits) == n_results:
+                break
+        # A short list would silently drop results a vector query returns
+        if len(hits) < n_results:
+            return None
+
+        return {
+            "ids": [[doc_id for doc_id, _, _ in hits]],
+            "documents": [[stored["document"] for _, stored, _ in hits]],
+            "metadatas": [[stored["metadata"] for _, stored, _ in hits]],
+            "distances": [[distance for _, _, distance in hits]],
+        }
+
+
+def build_answer_index(
+    embed: Callable[[List[str]], np.ndarray],
+    questions_path: Optional[Path] = None,
+    path: Path = ANSWER_INDEX_DIR,
+) -> AnswerIndex:
+    """Build and save the artifact, retrieving from Chroma Cloud"""
+    questions = load_canonical_questions(questions_path or CANONICAL_QUESTIONS_PATH)
+    index = AnswerIndex.build(questions, embed, _backend_query)
+    index.save(path)
+    return index
+
+
+def refresh_answer_index(path: Path = ANSWER_INDEX_DIR) -> Optional[AnswerIndex]:
+    """
+    Re-retrieve an existing artifact against the current collection and
+    stamp it with the current collection version (no embedding calls).
+    Returns None if there is no artifact for EMBEDDING_MODEL to refresh.
+    """
+    index = AnswerIndex.load(path)
+    if index is None or index.manifest.get("model") != EMBEDDING_MODEL:
+        return None
+    index = index.refresh(_backend_query)
+    index.save(path)
+    return index
+
+
+def _backend_query(embedding, n_results: int) -> dict:
+    from chroma_cloud import get_store
+    from projection import project_query
+
+    # Straight to Chroma Cloud: an existing artifact must never answer for
+    # itself, and the local replica may be older than the collection version
+    # the artifact gets stamped with. A failure propagates to the caller.
+    return get_store().query_similar(project_query(embedding), n_results)
+
+
+# Shared index used by the retriever, reloaded when the artifact changes
+_lock = threading.Lock()
+_index = None
+_index_mtime = None
+_warned_stale = None  # (artifact mtime, collection version) already warned about
+
+
+def get_answer_index(path: Path = ANSWER_INDEX_DIR) -> Optional[AnswerIndex]:
+    """The built artifact, or None if it is missing or older than the collection"""
+    global _index, _index_mtime, _warned_stale
+    try:
+        mtime = os.stat(Path(path) / ANSWERS_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _lock:
+        if mtime != _index_mtime:
+            _index = AnswerIndex.load(path) if mtime is not None else None
+            _index_mtime = mtime
+        index = _index
+
+    if index is None or index.manifest.get("model") != EMBEDDING_MODEL:
+        return None
+    version = read_collection_version()
+    if index.manifest.get("collection_version") != version:
+        metrics.incr("canonical.stale_index")
+        if _warned_stale != (mtime, version):
+            _warned_stale = (mtime, version)
+            print(f"   ⚠️ Canonical answer index is older than the collection, skipping it "
+                  f"(run manage.py answers to rebuild)")
+        return None
+    return index
+
+
+def lookup_answer(query_embedding, n_results: int = 4, where: Optional[dict] = None) -> Optional[dict]:
+    """Precomputed results if the query matches a canonical question"""
+    index = get_answer_index()
+    if index is None:
+        return None
+    return index.lookup(query_embedding, n_results, where)
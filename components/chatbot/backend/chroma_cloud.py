@@ -3,15 +3,35 @@ Chroma Cloud Integration for ShareMatch AI Chatbot
 
 This module handles connection to Chroma Cloud for production vector storage.
 Uses direct REST API calls (no SDK dependency issues).
+
+All calls go through a ChromaCloudClient, which keeps a pooled requests.Session
+(keep-alive, one TLS handshake per connection) and caches the resolved
+collection ID so normal operations cost a single round trip.
+
+export_collection/import_collection write and restore snapshots (a float32
+.npy matrix, a JSONL records table and a manifest), so a collection can be
+rebuilt in seconds without any embedding calls.
 """
 
 import os
+import json
 import time
+import threading
 import requests
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from typing import Iterator, List, Optional
 from dotenv import load_dotenv
 from pathlib import Path
 
+import metrics
+from rate_limiter import backoff_delay, parse_retry_after
+
+try:
+    import orjson
+except ImportError:  # optional - falls back to the stdlib encoder
+    orjson = None
+
 # Load environment variables
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env")
@@ -22,8 +42,68 @@ CHROMA_TENANT = os.getenv("CHROMA_TENANT", "0c2c7310-6d65-40d7-8924-d9cced8221dc
 CHROMA_DATABASE = os.getenv("CHROMA_DATABASE", "Prod")
 CHROMA_COLLECTION = os.getenv("CHROMA_COLLECTION", "sharematch_faq")
 
-# API base URL
-CHROMA_API_BASE = "https://api.trychroma.com/api/v2"
+# API base URL (overridable to point at a stand-in server, see benchmarks/)
+CHROMA_API_BASE = os.getenv("CHROMA_API_BASE", "https://api.trychroma.com/api/v2")
+
+# Connection pool size per host (seeding and bulk jobs reuse these connections)
+CHROMA_POOL_SIZE = 10
+
+# Retries per request for connection errors, 429 and 5xx
+CHROMA_MAX_RETRIES = 3
+
+# Bulk upload limits - batches are cut by record count and by serialized size
+UPLOAD_BATCH_SIZE = 100
+UPLOAD_BATCH_BYTES = 4 * 1024 * 1024
+UPLOAD_WORKERS = 4
+UPLOAD_BACKOFF_SECONDS = 1.0
+
+# Status codes worth retrying; anything else in 4xx is a payload problem
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# Collection endpoints, used to label request metrics
+COLLECTION_ACTIONS = {"add", "upsert", "query", "get", "delete", "count"}
+
+# Page size for walking or deleting the collection
+PAGE_SIZE = 500
+
+# Opt-in access-level sharding: documents go to <collection>_<access_level>
+# collections, so anonymous queries scan only the public shard, unfiltered
+CHROMA_ACCESS_SHARDING = os.getenv("CHROMA_ACCESS_SHARDING", "").lower() in ("1", "true", "yes")
+ACCESS_LEVELS = tuple(level for level in os.getenv("CHROMA_ACCESS_LEVELS", "public,authenticated").split(",") if level)
+SHARD_KEY = "access_level"
+
+# Collection snapshot layout (see export_collection / import_collection), plus
+# the records table from vector_files.py
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_EMBEDDINGS = "embeddings.npy"  # float32 matrix, one row per record
+SNAPSHOT_MANIFEST = "manifest.json"     # collection, model, dimensions, count
+
+
+class ChromaRequestError(Exception):
+    """Raised when Chroma Cloud answers with a non-2xx status"""
+
+    def __init__(self, response: requests.Response):
+        self.status_code = response.status_code
+        super().__init__(f"Chroma request failed: {response.status_code} - {response.text}")
+
+
+def _to_list(value):
+    """json fallback for NumPy arrays and scalars"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """
+    Serialize a request payload.
+
+    Embeddings may be float32 NumPy matrices; orjson encodes them natively
+    (much faster than decimal json text), otherwise they go through tolist().
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY, default=_to_list)
+    return json.dumps(payload, default=_to_list).encode("utf-8")
 
 
 def get_headers():
@@ -36,49 +116,929 @@ def get_headers():
     }
 
 
+def encode_records(
+    documents: List[str],
+    embeddings: List[List[float]],
+    metadatas: List[dict],
+    ids: List[str],
+) -> dict:
+    """Serialize every field of every record once: {"ids": [bytes, ...], ...}"""
+    return {
+        "ids": [dumps(value) for value in ids],
+        "documents": [dumps(value) for value in documents],
+        "embeddings": [dumps(value) for value in embeddings],
+        "metadatas": [dumps(value) for value in metadatas],
+    }
+
+
+def record_sizes(encoded: dict) -> List[int]:
+    """Serialized bytes per record, from encode_records()"""
+    return [sum(fields) for fields in zip(*([len(part) for part in parts] for parts in encoded.values()))]
+
+
+def join_records(encoded: dict, start: int, end: int) -> bytes:
+    """Request body for records [start, end) from encode_records(), without serializing again"""
+    fields = (b'"%s":[%s]' % (key.encode("utf-8"), b",".join(parts[start:end])) for key, parts in encoded.items())
+    return b"{" + b",".join(fields) + b"}"
+
+
+def split_batches(
+    sizes: List[int],
+    max_batch_size: int = UPLOAD_BATCH_SIZE,
+    max_batch_bytes: int = UPLOAD_BATCH_BYTES,
+) -> List[tuple]:
+    """
+    Split records with the given serialized sizes into (start, end) ranges
+    bounded by count and bytes.
+
+    A single record larger than max_batch_bytes still gets its own batch so the
+    server can decide whether to accept it.
+    """
+    batches = []
+    start = 0
+    batch_bytes = 0
+
+    for i, record_bytes in enumerate(sizes):
+        count = i - start
+        if count and (count >= max_batch_size or batch_bytes + record_bytes > max_batch_bytes):
+            batches.append((start, i))
+            start = i
+            batch_bytes = 0
+        batch_bytes += record_bytes
+
+    if start < len(sizes):
+        batches.append((start, len(sizes)))
+
+    return batches
+
+
+def write_snapshot(path: Path, ids: List[str], documents: List[str], metadatas: List[dict], embeddings, manifest: dict):
+    """Write a collection snapshot directory (see vector_files.py)"""
+    from vector_files import record_matrix, write_vector_files
+
+    matrix = record_matrix(embeddings, len(ids))
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        **manifest,
+        "count": len(ids),
+        "dimensions": int(matrix.shape[1]),
+        "dtype": "float32",
+        "created_at": time.time(),
+    }
+    write_vector_files(path, {SNAPSHOT_EMBEDDINGS: matrix}, ids, documents, metadatas, SNAPSHOT_MANIFEST, manifest)
+    return manifest
+
+
+def read_snapshot(path: Path, mmap: bool = True) -> dict:
+    """
+    Load a snapshot written by write_snapshot.
+
+    Returns {"manifest", "ids", "documents", "metadatas", "embeddings"}; the
+    embedding matrix is memory-mapped unless mmap=False.
+    """
+    import numpy as np
+    from vector_files import read_records
+
+    path = Path(path)
+    manifest_path = path / SNAPSHOT_MANIFEST
+    if not manifest_path.exists():
+        raise Exception(f"No snapshot found at {path}")
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise Exception(f"Unsupported snapshot format: {manifest.get('format')}")
+
+    ids, documents, metadatas = read_records(path)
+    embeddings = np.load(path / SNAPSHOT_EMBEDDINGS, mmap_mode="r" if mmap else None)
+    if len(ids) != manifest["count"] or embeddings.shape[0] != manifest["count"]:
+        raise Exception(f"Snapshot at {path} is incomplete ({len(ids)} records, {embeddings.shape[0]} vectors)")
+
+    return {"manifest": manifest, "ids": ids, "documents": documents, "metadatas": metadatas, "embeddings": embeddings}
+
+
+class CollectionSnapshots:
+    """
+    Whole-collection fetch and snapshot export/import for anything with the
+    collection interface (iter_pages, upsert_documents_batched, delete_documents, collection).
+    """
+
+    def fetch_collection(self, page_size: int = PAGE_SIZE):
+        """
+        Page through the whole collection.
+
+        Returns (ids, documents, metadatas, float32 matrix); an empty
+        collection gives a (0, dimensions) matrix for the published projection.
+        """
+        import numpy as np
+        from config import EMBEDDING_DIMENSIONS
+        from projection import get_projection
+
+        ids, documents, metadatas, blocks = [], [], [], []
+        for page in self.iter_pages(page_size=page_size, include=["documents", "metadatas", "embeddings"]):
+            ids.extend(page["ids"])
+            documents.extend(page.get("documents") or [""] * len(page["ids"]))
+            metadatas.extend([m or {} for m in (page.get("metadatas") or [{}] * len(page["ids"]))])
+            blocks.append(np.asarray(page["embeddings"], dtype=np.float32))
+
+        if blocks:
+            return ids, documents, metadatas, np.vstack(blocks)
+        projection = get_projection()
+        dimensions = projection.dimensions if projection else EMBEDDING_DIMENSIONS
+        return ids, documents, metadatas, np.zeros((0, dimensions), dtype=np.float32)
+
+    def export_collection(self, path: Path, page_size: int = PAGE_SIZE) -> dict:
+        """
+        Page through the collection and write it to a snapshot directory
+        (float32 .npy matrix + JSONL records + manifest). Returns the manifest.
+        """
+        from config import EMBEDDING_MODEL
+        from projection import get_projection
+
+        ids, documents, metadatas, embeddings = self.fetch_collection(page_size)
+        projection = get_projection()
+        manifest = write_snapshot(path, ids, documents, metadatas, embeddings, {
+            "collection": self.collection,
+            "model": EMBEDDING_MODEL,
+            "projection": projection.id if projection else None,
+        })
+        print(f"   💾 Exported {len(ids)} documents to {path}")
+        return manifest
+
+    def import_collection(self, path: Path, prune: bool = True, **upload_options) -> int:
+        """
+        Bulk-load a snapshot with the batched uploader (no embedding calls).
+
+        With prune=True, documents that are not in the snapshot are deleted so
+        the collection matches it exactly. Returns the number of documents
+        uploaded; raises if any batch failed.
+        """
+        from config import EMBEDDING_DIMENSIONS, EMBEDDING_MODEL
+        from projection import get_projection
+
+        snapshot = read_snapshot(path)
+        manifest = snapshot["manifest"]
+        # Stored vectors must match what queries are projected to
+        projection = get_projection()
+        if manifest.get("projection") != (projection.id if projection else None):
+            raise Exception("Snapshot was taken with a different PCA projection than the published one")
+        dimensions = projection.dimensions if projection else EMBEDDING_DIMENSIONS
+        if manifest["count"] and manifest["dimensions"] != dimensions:
+            raise Exception(f"Snapshot has {manifest['dimensions']}-dim vectors, expected {dimensions}")
+        if manifest.get("model") and manifest["model"] != EMBEDDING_MODEL:
+            raise Exception(f"Snapshot was embedded with {manifest['model']}, not {EMBEDDING_MODEL}")
+
+        existing = set()
+        if prune:
+            for page in self.iter_pages(include=[]):
+                existing.update(page["ids"])
+
+        results = self.upsert_documents_batched(
+            snapshot["documents"], snapshot["embeddings"], snapshot["metadatas"], snapshot["ids"],
+            **upload_options,
+        )
+        failed = [r for r in results if not r["ok"]]
+        if failed:
+            raise Exception(f"{len(failed)} of {len(results)} batches failed to upload: {failed[0]['error']}")
+
+        stale = sorted(existing - set(snapshot["ids"]))
+        if stale:
+            self.delete_documents(stale)
+            print(f"   🗑️ Deleted {len(stale)} documents not in the snapshot")
+
+        print(f"   📥 Imported {manifest['count']} documents from {path}")
+        return manifest["count"]
+
+
+class ChromaCloudClient(CollectionSnapshots):
+    """
+    Stateful Chroma Cloud client.
+
+    Holds a pooled requests.Session and caches the collection ID. The cached
+    ID is dropped automatically when the server answers 404 for it (e.g. the
+    collection was deleted and recreated), and the request is retried once.
+    """
+
+    def __init__(
+        self,
+        collection: str = CHROMA_COLLECTION,
+        tenant: str = CHROMA_TENANT,
+        database: str = CHROMA_DATABASE,
+        api_base: str = CHROMA_API_BASE,
+        pool_size: int = CHROMA_POOL_SIZE,
+        timeout: Optional[float] = None,
+        max_retries: int = CHROMA_MAX_RETRIES,
+    ):
+        self.collection = collection
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.tenant = tenant
+        self.database = database
+        self.api_base = api_base
+        self._collection_id: Optional[str] = None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def database_url(self) -> str:
+        return f"{self.api_base}/tenants/{self.tenant}/databases/{self.database}"
+
+    def collection_url(self, collection_id: str, action: str = "") -> str:
+        url = f"{self.database_url}/collections/{collection_id}"
+        return f"{url}/{action}" if action else url
+
+    def invalidate(self):
+        """Forget the cached collection ID"""
+        self._collection_id = None
+
+    def close(self):
+        self.session.close()
+
+    def _send(self, method: str, url: str, payload: Optional[dict] = None) -> requests.Response:
+        """
+        Send one request, retrying connection errors, timeouts, 429 and 5xx
+        with backoff. This is the only retry layer. payload is a dict or an
+        already serialized body.
+        """
+        data = payload if isinstance(payload, bytes) or payload is None else dumps(payload)
+        action = url.rsplit("/", 1)[-1] if url.rsplit("/", 1)[-1] in COLLECTION_ACTIONS else "collection"
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                metrics.incr("chroma.retries", action=action)
+            with metrics.span("chroma.request", method=method, action=action) as span:
+                try:
+                    response = self.session.request(
+                        method, url, headers=get_headers(), data=data, timeout=self.timeout
+                    )
+                except (requests.ConnectionError, requests.Timeout):
+                    span.set(status="connection_error", bytes_sent=len(data or b""))
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(backoff_delay(attempt, base=UPLOAD_BACKOFF_SECONDS))
+                    continue
+                span.set(
+                    status=response.status_code,
+                    bytes_sent=len(data or b""),
+                    bytes_received=len(response.content),
+                )
+
+            if response.status_code not in RETRYABLE_STATUS or attempt == self.max_retries:
+                return response
+
+            delay = parse_retry_after(response.headers.get("Retry-After"))
+            time.sleep(delay if delay is not None else backoff_delay(attempt, base=UPLOAD_BACKOFF_SECONDS))
+
+        return response
+
+    def get_collection_id(self) -> Optional[str]:
+        """Get the collection ID from Chroma Cloud (cached after the first lookup)"""
+        if self._collection_id:
+            return self._collection_id
+
+        response = self._send("GET", self.collection_url(self.collection))
+
+        if response.status_code == 404:
+            return None
+
+        if not response.ok:
+            raise Exception(f"Failed to get collection: {response.status_code} - {response.text}")
+
+        self._collection_id = response.json().get("id")
+        return self._collection_id
+
+    def create_collection(self) -> str:
+        """Create the collection in Chroma Cloud"""
+        payload = {
+            "name": self.collection,
+            "metadata": {"description": "ShareMatch FAQ embeddings"}
+        }
+
+        response = self._send("POST", f"{self.database_url}/collections", payload)
+
+        if not response.ok:
+            raise Exception(f"Failed to create collection: {response.status_code} - {response.text}")
+
+        self._collection_id = response.json().get("id")
+        return self._collection_id
+
+    def get_or_create_collection(self) -> str:
+        """Get or create the collection, returns collection ID"""
+        collection_id = self.get_collection_id()
+
+        if collection_id:
+            return collection_id
+
+        print(f"   📦 Creating collection: {self.collection}")
+        return self.create_collection()
+
+    def delete_collection(self) -> bool:
+        """
+        Drop the whole collection (e.g. to change its embedding dimension,
+        which Chroma fixes on first insert). Returns False if it didn't exist.
+        """
+        response = self._send("DELETE", self.collection_url(self.collection))
+        self.invalidate()
+
+        if response.status_code == 404:
+            return False
+
+        if not response.ok:
+            raise Exception(f"Failed to delete collection: {response.status_code} - {response.text}")
+
+        return True
+
+    def _collection_request(
+        self,
+        method: str,
+        action: str,
+        payload=None,
+        create: bool = True,
+    ) -> Optional[requests.Response]:
+        """
+        Send a request to a collection endpoint using the cached ID.
+
+        Returns None when the collection does not exist and create is False.
+        """
+        for attempt in range(2):
+            collection_id = self.get_or_create_collection() if create else self.get_collection_id()
+            if not collection_id:
+                return None
+
+            response = self._send(method, self.collection_url(collection_id, action), payload)
+
+            if response.status_code == 404 and attempt == 0:
+                # Stale cached ID - resolve it again and retry once
+                self.invalidate()
+                continue
+
+            return response
+
+        return response
+
+    def add_documents(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> int:
+        """Add documents with embeddings to Chroma Cloud"""
+        # Generate IDs if not provided
+        if ids is None:
+            ids = [f"doc_{i}" for i in range(len(documents))]
+
+        payload = {
+            "ids": ids,
+            "documents": documents,
+            "embeddings": embeddings,
+            "metadatas": metadatas or [{}] * len(documents),
+        }
+
+        response = self._collection_request("POST", "add", payload)
+
+        if not response.ok:
+            raise Exception(f"Failed to add documents: {response.status_code} - {response.text}")
+
+        return len(documents)
+
+    def upsert_documents(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> int:
+        """Upsert documents with embeddings (safe to retry, unlike add)"""
+        if ids is None:
+            ids = [f"doc_{i}" for i in range(len(documents))]
+
+        payload = {
+            "ids": ids,
+            "documents": documents,
+            "embeddings": embeddings,
+            "metadatas": metadatas or [{}] * len(documents),
+        }
+
+        response = self._collection_request("POST", "upsert", payload)
+
+        if not response.ok:
+            raise ChromaRequestError(response)
+
+        return len(documents)
+
+    def upsert_documents_batched(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        max_batch_size: int = UPLOAD_BATCH_SIZE,
+        max_batch_bytes: int = UPLOAD_BATCH_BYTES,
+        max_workers: int = UPLOAD_WORKERS,
+    ) -> List[dict]:
+        """
+        Upsert documents in size-bounded batches using a bounded worker pool.
+
+        Each record is serialized once, both to size the batches and to build
+        the request bodies. Retries happen per request in _send. Returns one
+        result per batch: {"batch", "start", "count", "ok", "error"}.
+        """
+        if ids is None:
+            ids = [f"doc_{i}" for i in range(len(documents))]
+        if metadatas is None:
+            metadatas = [{}] * len(documents)
+
+        # Resolve the collection once up front so workers share the cached ID
+        self.get_or_create_collection()
+
+        encoded = encode_records(documents, embeddings, metadatas, ids)
+        batches = split_batches(record_sizes(encoded), max_batch_size, max_batch_bytes)
+
+        def upload(batch_index: int, start: int, end: int) -> dict:
+            result = {"batch": batch_index, "start": start, "count": end - start, "ok": False, "error": None}
+            try:
+                response = self._collection_request("POST", "upsert", join_records(encoded, start, end))
+                if not response.ok:
+                    raise ChromaRequestError(response)
+                result["ok"] = True
+            except (ChromaRequestError, requests.RequestException) as e:
+                result["error"] = str(e)
+            return result
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = [pool.submit(upload, i, start, end) for i, (start, end) in enumerate(batches)]
+            return [future.result() for future in futures]
+
+    def query_similar(
+        self,
+        query_embedding: List[float],
+        n_results: int = 4,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+    ) -> dict:
+        """Query similar documents from Chroma Cloud"""
+        return self.query_batch([query_embedding], n_results, where, include)
+
+    def query_batch(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 4,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Query several embeddings in one request (one result row per embedding).
+
+        include defaults to documents, metadatas and distances; add
+        "embeddings" to get the matched vectors back (e.g. for re-ranking).
+        """
+        payload = {
+            "query_embeddings": query_embeddings,
+            "n_results": n_results,
+            "include": include or ["documents", "metadatas", "distances"]
+        }
+        if where:
+            payload["where"] = where
+
+        # Queries never create the collection; a missing one has no matches
+        response = self._collection_request("POST", "query", payload, create=False)
+
+        if response is None:
+            return {key: [[] for _ in query_embeddings] for key in ["ids", *payload["include"]]}
+
+        if not response.ok:
+            raise Exception(f"Failed to query: {response.status_code} - {response.text}")
+
+        return response.json()
+
+    def get_documents(
+        self,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> Optional[dict]:
+        """
+        Fetch one page of records from the collection.
+
+        Returns None when the collection does not exist.
+        """
+        payload = {"include": include if include is not None else []}
+        if limit is not None:
+            payload["limit"] = limit
+        if offset:
+            payload["offset"] = offset
+        if where:
+            payload["where"] = where
+        if ids is not None:
+            payload["ids"] = ids
+
+        response = self._collection_request("POST", "get", payload, create=False)
+
+        if response is None:
+            return None
+
+        if not response.ok:
+            raise ChromaRequestError(response)
+
+        return response.json()
+
+    def iter_pages(
+        self,
+        page_size: int = PAGE_SIZE,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+    ) -> Iterator[dict]:
+        """Walk the collection with limit/offset, yielding one page at a time"""
+        offset = 0
+        while True:
+            page = self.get_documents(limit=page_size, offset=offset, where=where, include=include)
+            if not page or not page.get("ids"):
+                return
+            yield page
+            if len(page["ids"]) < page_size:
+                return
+            offset += len(page["ids"])
+
+    def delete_documents(self, ids: List[str], page_size: int = PAGE_SIZE) -> int:
+        """Delete documents by ID (page_size IDs per request), returns the number of IDs sent"""
+        deleted = 0
+        for start in range(0, len(ids), page_size):
+            page = ids[start:start + page_size]
+            response = self._collection_request("POST", "delete", {"ids": page}, create=False)
+
+            if response is None:
+                return deleted
+
+            if not response.ok:
+                raise ChromaRequestError(response)
+
+            deleted += len(page)
+
+        return deleted
+
+    def clear_collection(self, where: Optional[dict] = None, page_size: int = PAGE_SIZE) -> int:
+        """
+        Delete documents from the collection page by page.
+
+        With a metadata filter (e.g. {"type": "video"} or {"source": "faq.pdf"})
+        only matching documents are removed. Each page is fetched from offset 0
+        because deleting it shifts the remaining documents forward, so memory
+        and request size stay bounded by page_size. Returns the number deleted.
+        """
+        scope = f" matching {where}" if where else ""
+        deleted = 0
+
+        while True:
+            try:
+                page = self.get_documents(limit=page_size, where=where)
+            except ChromaRequestError as e:
+                print(f"   ⚠️ Could not get documents: {e.status_code}")
+                break
+
+            if page is None:
+                print(f"   ℹ️ Collection doesn't exist yet, nothing to clear")
+                return 0
+
+            ids = page.get("ids", [])
+            if not ids:
+                break
+
+            try:
+                deleted += self.delete_documents(ids)
+            except ChromaRequestError as e:
+                print(f"   ⚠️ Delete failed: {e}")
+                break
+
+            if len(ids) < page_size:
+                break
+
+        if deleted:
+            print(f"   🗑️ Deleted {deleted} documents{scope} from collection")
+        else:
+            print(f"   ℹ️ No documents{scope} to delete")
+
+        return deleted
+
+    def get_collection_count(self) -> int:
+        """Get the number of documents in the collection"""
+        try:
+            response = self._collection_request("GET", "count", create=False)
+
+            if response is not None and response.ok:
+                return response.json()
+            return 0
+        except Exception as e:
+            print(f"   ⚠️ Could not get count: {e}")
+            return 0
+
+
+def shard_collection_name(access_level: str, collection: str = CHROMA_COLLECTION) -> str:
+    return f"{collection}_{access_level}"
+
+
+def split_shard_filter(where: Optional[dict], shard_key: str = SHARD_KEY):
+    """
+    Pull a shard-key condition out of a where filter.
+
+    Returns (access levels or None, remaining filter), e.g.
+    {"access_level": "public", "type": "video"} -> (["public"], {"type": "video"}).
+    Only top-level equality / $eq / $in conditions are routed.
+    """
+    if not where:
+        return None, where
+    conditions = where["$and"] if set(where) == {"$and"} else [{k: v} for k, v in where.items()]
+
+    levels, remaining = None, []
+    for condition in conditions:
+        value = condition.get(shard_key) if len(condition) == 1 else None
+        if isinstance(value, str):
+            levels = [value]
+        elif isinstance(value, dict) and set(value) == {"$eq"}:
+            levels = [value["$eq"]]
+        elif isinstance(value, dict) and set(value) == {"$in"}:
+            levels = list(value["$in"])
+        else:
+            remaining.append(condition)
+
+    if not remaining:
+        return levels, None
+    return levels, remaining[0] if len(remaining) == 1 else {"$and": remaining}
+
+
+def merge_shard_results(responses: List[dict], n_results: int) -> dict:
+    """Merge single-query responses from several shards by ascending distance"""
+    keys = [key for key in ("ids", "documents", "metadatas", "distances", "embeddings")
+            if any(response.get(key) for response in responses)]
+    rows = []
+    for response in responses:
+        for i, distance in enumerate(response["distances"][0]):
+            rows.append((distance, {key: response[key][0][i] for key in keys}))
+    rows.sort(key=lambda row: row[0])
+    return {key: [[row[key] for _, row in rows[:n_results]]] for key in keys}
+
+
+class ShardedChromaClient(CollectionSnapshots):
+    """
+    One Chroma collection per access level, behind the ChromaCloudClient
+    methods the seeder and retrievers use.
+
+    Writes are routed by each document's access_level metadata. Queries go
+    only to the shards the caller may see (taken from access_levels or from an
+    access_level condition in the where filter); with several shards they run
+    concurrently and are merged by distance.
+    """
+
+    def __init__(
+        self,
+        collection: str = CHROMA_COLLECTION,
+        access_levels=ACCESS_LEVELS,
+        shard_key: str = SHARD_KEY,
+        **client_options,
+    ):
+        self.collection = collection
+        self.access_levels = tuple(access_levels)
+        self.shard_key = shard_key
+        self._client_options = client_options
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def shard(self, access_level: str) -> ChromaCloudClient:
+        if access_level not in self.access_levels:
+            raise Exception(f"Unknown access level {access_level!r} (expected one of {self.access_levels})")
+        with self._lock:
+            client = self._shards.get(access_level)
+            if client is None:
+                client = ChromaCloudClient(shard_collection_name(access_level, self.collection), **self._client_options)
+                self._shards[access_level] = client
+        return client
+
+    def _group_by_shard(self, metadatas: List[dict]) -> dict:
+        """access level -> row indexes of the documents routed to that shard"""
+        groups = {}
+        for i, metadata in enumerate(metadatas):
+            groups.setdefault((metadata or {}).get(self.shard_key, "public"), []).append(i)
+        return groups
+
+    def close(self):
+        with self._lock:
+            for client in self._shards.values():
+                client.close()
+            self._shards = {}
+
+    def upsert_documents_batched(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None,
+        **upload_options,
+    ) -> List[dict]:
+        """
+        Upsert into each document's shard; results carry a "shard" key.
+
+        Uploaded documents are then deleted from every other shard, so a
+        document whose access_level changed is no longer readable under the
+        old one.
+        """
+        if ids is None:
+            ids = [f"doc_{i}" for i in range(len(documents))]
+        if metadatas is None:
+            metadatas = [{}] * len(documents)
+
+        groups = self._group_by_shard(metadatas)
+
+        results = []
+        uploaded = {}  # access level -> IDs now stored in that shard
+        for access_level, rows in groups.items():
+            shard_results = self.shard(access_level).upsert_documents_batched(
+                [documents[i] for i in rows],
+                [embeddings[i] for i in rows],
+                [metadatas[i] for i in rows],
+                [ids[i] for i in rows],
+                **upload_options,
+            )
+            results.extend({**result, "shard": access_level} for result in shard_results)
+            for result in shard_results:
+                if result["ok"]:
+                    batch_rows = rows[result["start"]:result["start"] + result["count"]]
+                    uploaded.setdefault(access_level, []).extend(ids[i] for i in batch_rows)
+
+        for access_level in self.access_levels:
+            stale = [doc_id for level, doc_ids in uploaded.items() if level != access_level for doc_id in doc_ids]
+            if stale:
+                self.shard(access_level).delete_documents(stale)
+        return results
+
+    def add_documents(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> int:
+        """Add documents to each document's shard"""
+        if ids is None:
+            ids = [f"doc_{i}" for i in range(len(documents))]
+        if metadatas is None:
+            metadatas = [{}] * len(documents)
+
+        groups = self._group_by_shard(metadatas)
+        for access_level, rows in groups.items():
+            self.shard(access_level).add_documents(
+                [documents[i] for i in rows],
+                [embeddings[i] for i in rows],
+                [metadatas[i] for i in rows],
+                [ids[i] for i in rows],
+            )
+        return len(documents)
+
+    def upsert_documents(
+        self,
+        documents: List[str],
+        embeddings: List[List[float]],
+        metadatas: Optional[List[dict]] = None,
+        ids: Optional[List[str]] = None
+    ) -> int:
+        """Upsert documents into their shards (see upsert_documents_batched)"""
+        results = self.upsert_documents_batched(documents, embeddings, metadatas, ids)
+        failed = [r for r in results if not r["ok"]]
+        if failed:
+            raise Exception(f"Failed to upsert documents: {failed[0]['error']}")
+        return len(documents)
+
+    def iter_pages(
+        self,
+        page_size: int = PAGE_SIZE,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+    ) -> Iterator[dict]:
+        levels, where = split_shard_filter(where, self.shard_key)
+        for access_level in levels or self.access_levels:
+            yield from self.shard(access_level).iter_pages(page_size, where, include)
+
+    def delete_documents(self, ids: List[str], page_size: int = PAGE_SIZE) -> int:
+        """Delete IDs from every shard (IDs missing from a shard are ignored)"""
+        for access_level in self.access_levels:
+            self.shard(access_level).delete_documents(ids, page_size)
+        return len(ids)
+
+    def clear_collection(self, where: Optional[dict] = None, page_size: int = PAGE_SIZE) -> int:
+        levels, where = split_shard_filter(where, self.shard_key)
+        return sum(
+            self.shard(access_level).clear_collection(where, page_size)
+            for access_level in levels or self.access_levels
+        )
+
+    def get_collection_count(self) -> int:
+        return sum(self.shard(access_level).get_collection_count() for access_level in self.access_levels)
+
+    def delete_collection(self) -> bool:
+        """Drop every shard collection; True if any existed"""
+        return any([self.shard(access_level).delete_collection() for access_level in self.access_levels])
+
+    def query_similar(
+        self,
+        query_embedding: List[float],
+        n_results: int = 4,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+        access_levels: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Query the shards for access_levels and the where filter's access_level
+        condition (both when both are given; all shards if neither is).
+        """
+        return self.query_batch([query_embedding], n_results, where, include, access_levels)
+
+    def query_batch(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 4,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+        access_levels: Optional[List[str]] = None,
+    ) -> dict:
+        """Multi-embedding query across shards, merged by distance row by row"""
+        levels, where = split_shard_filter(where, self.shard_key)
+        if access_levels:
+            # Both narrow the search: only shards allowed by both are queried
+            levels = [level for level in access_levels if levels is None or level in levels]
+        elif levels is None:
+            levels = list(self.access_levels)
+        if not levels:
+            raise Exception("access_levels and the where filter's access_level condition leave no shard to query")
+        if len(levels) == 1:
+            return self.shard(levels[0]).query_batch(query_embeddings, n_results, where, include)
+
+        include = list(include or ["documents", "metadatas", "distances"])
+        if "distances" not in include:
+            include.append("distances")
+        with ThreadPoolExecutor(max_workers=len(levels)) as pool:
+            responses = list(pool.map(
+                lambda level: self.shard(level).query_batch(query_embeddings, n_results, where, include),
+                levels,
+            ))
+
+        keys = ["ids", *include]
+        merged = {key: [] for key in keys}
+        for row in range(len(query_embeddings)):
+            row_responses = [{key: [response[key][row]] for key in keys if response.get(key)} for response in responses]
+            result = merge_shard_results(row_responses, n_results)
+            for key in keys:
+                merged[key].extend(result.get(key) or [[]])
+        return merged
+
+
+# Shared client used by the module-level helpers below
+_client: Optional[ChromaCloudClient] = None
+_sharded_client: Optional[ShardedChromaClient] = None
+
+
+def get_client() -> ChromaCloudClient:
+    """Get the shared ChromaCloudClient for the configured collection"""
+    global _client
+    if _client is None:
+        _client = ChromaCloudClient()
+    return _client
+
+
+def get_sharded_client() -> ShardedChromaClient:
+    """Get the shared ShardedChromaClient for the configured collection"""
+    global _sharded_client
+    if _sharded_client is None:
+        _sharded_client = ShardedChromaClient()
+    return _sharded_client
+
+
+def get_store():
+    """The sharded client if CHROMA_ACCESS_SHARDING is on, otherwise the single-collection one"""
+    return get_sharded_client() if CHROMA_ACCESS_SHARDING else get_client()
+
+
+def _single_collection_client() -> ChromaCloudClient:
+    """get_client(), unless sharding means nothing reads the single collection"""
+    if CHROMA_ACCESS_SHARDING:
+        raise Exception("CHROMA_ACCESS_SHARDING is on: use get_sharded_client().shard(access_level) instead")
+    return get_client()
+
+
 def get_collection_id():
     """Get the collection ID from Chroma Cloud"""
-    url = f"{CHROMA_API_BASE}/tenants/{CHROMA_TENANT}/databases/{CHROMA_DATABASE}/collections/{CHROMA_COLLECTION}"
-    
-    response = requests.get(url, headers=get_headers())
-    
-    if response.status_code == 404:
-        return None
-    
-    if not response.ok:
-        raise Exception(f"Failed to get collection: {response.status_code} - {response.text}")
-    
-    data = response.json()
-    return data.get("id")
+    return _single_collection_client().get_collection_id()
 
 
 def create_collection():
     """Create the collection in Chroma Cloud"""
-    url = f"{CHROMA_API_BASE}/tenants/{CHROMA_TENANT}/databases/{CHROMA_DATABASE}/collections"
-    
-    payload = {
-        "name": CHROMA_COLLECTION,
-        "metadata": {"description": "ShareMatch FAQ embeddings"}
-    }
-    
-    response = requests.post(url, headers=get_headers(), json=payload)
-    
-    if not response.ok:
-        raise Exception(f"Failed to create collection: {response.status_code} - {response.text}")
-    
-    data = response.json()
-    return data.get("id")
+    return _single_collection_client().create_collection()
 
 
 def get_or_create_collection():
     """Get or create the collection, returns collection ID"""
-    collection_id = get_collection_id()
-    
-    if collection_id:
-        return collection_id
-    
-    print(f"   📦 Creating collection: {CHROMA_COLLECTION}")
-    return create_collection()
+    return _single_collection_client().get_or_create_collection()
 
 
 def add_documents(
@@ -88,102 +1048,65 @@ def add_documents(
     ids: Optional[List[str]] = None
 ):
     """Add documents with embeddings to Chroma Cloud"""
-    collection_id = get_or_create_collection()
-    
-    # Generate IDs if not provided
-    if ids is None:
-        ids = [f"doc_{i}" for i in range(len(documents))]
-    
-    url = f"{CHROMA_API_BASE}/tenants/{CHROMA_TENANT}/databases/{CHROMA_DATABASE}/collections/{collection_id}/add"
-    
-    payload = {
-        "ids": ids,
-        "documents": documents,
-        "embeddings": embeddings,
-        "metadatas": metadatas or [{}] * len(documents),
-    }
-    
-    response = requests.post(url, headers=get_headers(), json=payload)
-    
-    if not response.ok:
-        raise Exception(f"Failed to add documents: {response.status_code} - {response.text}")
-    
-    return len(documents)
+    return get_store().add_documents(documents, embeddings, metadatas, ids)
+
+
+def upsert_documents(
+    documents: List[str],
+    embeddings: List[List[float]],
+    metadatas: Optional[List[dict]] = None,
+    ids: Optional[List[str]] = None
+):
+    """Upsert documents with embeddings to Chroma Cloud in a single request"""
+    return get_store().upsert_documents(documents, embeddings, metadatas, ids)
+
+
+def upsert_documents_batched(
+    documents: List[str],
+    embeddings: List[List[float]],
+    metadatas: Optional[List[dict]] = None,
+    ids: Optional[List[str]] = None,
+    **kwargs
+) -> List[dict]:
+    """Upsert documents in parallel, size-bounded, retried batches"""
+    return get_store().upsert_documents_batched(documents, embeddings, metadatas, ids, **kwargs)
 
 
 def query_similar(
     query_embedding: List[float],
-    n_results: int = 4
+    n_results: int = 4,
+    where: Optional[dict] = None,
+    include: Optional[List[str]] = None,
 ) -> dict:
     """Query similar documents from Chroma Cloud"""
-    collection_id = get_or_create_collection()
-    
-    url = f"{CHROMA_API_BASE}/tenants/{CHROMA_TENANT}/databases/{CHROMA_DATABASE}/collections/{collection_id}/query"
-    
-    payload = {
-        "query_embeddings": [query_embedding],
-        "n_results": n_results,
-        "include": ["documents", "metadatas", "distances"]
-    }
-    
-    response = requests.post(url, headers=get_headers(), json=payload)
-    
-    if not response.ok:
-        raise Exception(f"Failed to query: {response.status_code} - {response.text}")
-    
-    return response.json()
-
-
-def clear_collection():
-    """Clear all documents from the collection"""
-    collection_id = get_collection_id()
-    
-    if not collection_id:
-        print(f"   ℹ️ Collection doesn't exist yet, nothing to clear")
-        return
-    
-    # Get all document IDs
-    url = f"{CHROMA_API_BASE}/tenants/{CHROMA_TENANT}/databases/{CHROMA_DATABASE}/collections/{collection_id}/get"
-    
-    response = requests.post(url, headers=get_headers(), json={"include": []})
-    
-    if not response.ok:
-        print(f"   ⚠️ Could not get documents: {response.status_code}")
-        return
-    
-    data = response.json()
-    ids = data.get("ids", [])
-    
-    if not ids:
-        print(f"   ℹ️ Collection is already empty")
-        return
-    
-    # Delete all documents
-    delete_url = f"{CHROMA_API_BASE}/tenants/{CHROMA_TENANT}/databases/{CHROMA_DATABASE}/collections/{collection_id}/delete"
-    
-    delete_response = requests.post(delete_url, headers=get_headers(), json={"ids": ids})
-    
-    if delete_response.ok:
-        print(f"   🗑️ Deleted {len(ids)} documents from collection")
-    else:
-        print(f"   ⚠️ Delete failed: {delete_response.status_code} - {delete_response.text}")
+    return get_store().query_similar(query_embedding, n_results, where, include)
+
+
+def delete_documents(ids: List[str]) -> int:
+    """Delete documents by ID"""
+    return get_store().delete_documents(ids)
+
+
+def clear_collection(where: Optional[dict] = None, page_size: int = PAGE_SIZE) -> int:
+    """Clear documents from the collection, optionally only those matching a filter"""
+    return get_store().clear_collection(where=where, page_size=page_size)
 
 
 def get_collection_count() -> int:
     """Get the number of documents in the collection"""
-    try:
-        collection_id = get_collection_id()
-        
-        if not collection_id:
-            return 0
-        
-        url = f"{CHROMA_API_BASE}/tenants/{CHROMA_TENANT}/databases/{CHROMA_DATABASE}/collections/{collection_id}/count"
-        
-        response = requests.get(url, headers=get_headers())
-        
-        if response.ok:
-            return response.json()
-        return 0
-    except Exception as e:
-        print(f"   ⚠️ Could not get count: {e}")
-        return 0
+    return get_store().get_collection_count()
+
+
+def export_collection(path: Path, page_size: int = PAGE_SIZE) -> dict:
+    """Write the collection to a snapshot directory"""
+    return get_store().export_collection(path, page_size)
+
+
+def import_collection(path: Path, prune: bool = True, **upload_options) -> int:
+    """Restore the collection from a snapshot directory"""
+    return get_store().import_collection(path, prune, **upload_options)
+
+
+def delete_collection() -> bool:
+    """Drop the collection (every shard when sharded)"""
+    return get_store().delete_collection()
@@ -6,18 +6,65 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env")
 
 DATA_PATH = BASE_DIR / "data" / "faq.pdf"
+# PDFs to seed (FAQ_PDF_PATHS is an os.pathsep-separated list, defaults to the FAQ)
+PDF_PATHS = [Path(p) for p in os.getenv("FAQ_PDF_PATHS", str(DATA_PATH)).split(os.pathsep) if p]
 VIDEOS_PATH = BASE_DIR / "data" / "videos.json"
+# Curated questions answered from a precomputed index (see canonical_answers.py)
+CANONICAL_QUESTIONS_PATH = BASE_DIR / "data" / "canonical_questions.json"
 CHROMA_DIR = BASE_DIR / "chroma_db"
 
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 150
 
+# Processes for PDF extraction/splitting (0 = one per CPU core)
+LOADER_PROCESSES = int(os.getenv("LOADER_PROCESSES", "0"))
+
+# Chunks at or above this Jaccard similarity (word shingles) are merged before
+# embedding; 1 = exact duplicates only, 0 = keep everything
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+
 # HuggingFace Inference API model (384 dimensions, faster)
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 EMBEDDING_DIMENSIONS = 384
 
+# Optional PCA reduction of stored vectors (see projection.py); 0 = full size.
+# The seeder refuses to publish a projection whose top-k neighbour overlap
+# with full-size search is below REDUCTION_MIN_RECALL.
+EMBEDDING_REDUCED_DIMENSIONS = int(os.getenv("EMBEDDING_REDUCED_DIMENSIONS", "0"))
+REDUCTION_MIN_RECALL = float(os.getenv("REDUCTION_MIN_RECALL", "0.9"))
+
+# Embedding backend: "http" (HuggingFace Inference API), "onnx" (ONNX Runtime on
+# CPU) or "sentence-transformers" (local PyTorch on CPU). Local backends load
+# weights from EMBEDDING_MODEL_PATH; EMBEDDING_PROCESSES > 0 spreads local
+# inference over a process pool.
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "http")
+EMBEDDING_MODEL_PATH = Path(os.getenv("EMBEDDING_MODEL_PATH", str(BASE_DIR / "models" / "all-MiniLM-L6-v2")))
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", "0"))
+# Vectors recorded from a trusted backend that `manage.py embedder` checks local ones against
+EMBEDDING_REFERENCE_PATH = Path(os.getenv("EMBEDDING_REFERENCE_PATH", str(BASE_DIR / "data" / "embedding_reference.json")))
+
 GROQ_MODEL = "llama-3.1-8b-instant"
 
 # Get API keys from environment
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-HF_TOKEN = os.getenv("HF_TOKEN")
\ No newline at end of file
+HF_TOKEN = os.getenv("HF_TOKEN")
+
+# Retrieval backend: "cloud" (Chroma Cloud, falls back to the local replica on
+# errors/timeouts) or "local" (local replica in CHROMA_DIR only)
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "cloud")
+CLOUD_QUERY_TIMEOUT = float(os.getenv("CLOUD_QUERY_TIMEOUT", "2.0"))
+
+# Retrieval result cache (see query_cache.py)
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "256"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "3600"))
+
+# Query embeddings at least this cosine-similar to a canonical question get its
+# precomputed results without a vector store query
+CANONICAL_MATCH_THRESHOLD = float(os.getenv("CANONICAL_MATCH_THRESHOLD", "0.9"))
+
+# Embedding API throughput (see rate_limiter.py / embeddings.py)
+EMBEDDING_RATE_LIMIT = float(os.getenv("EMBEDDING_RATE_LIMIT", "2.0"))  # requests per second
+# Ceiling the limiter probes up to while requests succeed (never below the starting rate)
+EMBEDDING_MAX_RATE_LIMIT = max(EMBEDDING_RATE_LIMIT, float(os.getenv("EMBEDDING_MAX_RATE_LIMIT", "8.0")))
+EMBEDDING_WORKERS = int(os.getenv("EMBEDDING_WORKERS", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
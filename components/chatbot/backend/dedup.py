@@ -0,0 +1,169 @@
+"""
+Near-duplicate chunk elimination before embedding
+
+Chunks whose normalized text is identical are merged via a hash lookup (fast
+path). The rest are compared with MinHash signatures over word shingles,
+bucketed with LSH so only likely pairs are checked; a candidate pair is merged
+when the exact Jaccard similarity of its shingle sets reaches the threshold.
+
+The first chunk of each group is kept and records where its duplicates came
+from in its metadata (duplicate_ids / duplicate_pages / duplicate_count).
+"""
+
+import hashlib
+import re
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from config import DEDUP_THRESHOLD
+import metrics
+
+SHINGLE_SIZE = 5
+NUM_PERM = 128
+
+# Prime just above 2**32; with a, b, x < 2**32, a * x + b still fits in uint64
+_PRIME = np.uint64(4294967311)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace (what counts as an exact duplicate)"""
+    return " ".join(text.lower().split())
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Set of word n-grams; short texts are a single shingle"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_params(threshold: float, num_perm: int = NUM_PERM):
+    """
+    (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1/bands) ** (1/rows) sits comfortably below the target similarity, so
+    pairs at the threshold almost always become candidates.
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold - 0.1:
+            best = (bands, rows)
+    return best
+
+
+class MinHasher:
+    """MinHash signatures from universal hashes h(x) = (a*x + b) mod p"""
+
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_MAX_HASH), size=num_perm, dtype=np.uint64)
+
+    def signature(self, shingle_set: set) -> np.ndarray:
+        hashes = np.fromiter(
+            (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little")
+             for s in shingle_set),
+            dtype=np.uint64,
+            count=len(shingle_set),
+        )
+        permuted = (hashes[:, None] * self.a + self.b) % _PRIME
+        return permuted.min(axis=0)
+
+
+def find_duplicates(texts: List[str], threshold: float = DEDUP_THRESHOLD) -> List[int]:
+    """
+    For each text, the index of the text it duplicates (itself if unique).
+
+    Earlier texts win, so the canonical index is always <= the text's own.
+    """
+    canonical = list(range(len(texts)))
+    if threshold <= 0:
+        return canonical
+
+    # Fast path: identical normalized text
+    seen = {}
+    for i, text in enumerate(texts):
+        key = hashlib.sha256(normalize_text(text).encode("utf-8")).digest()
+        canonical[i] = seen.setdefault(key, i)
+
+    if threshold >= 1:
+        return canonical
+
+    unique = [i for i in range(len(texts)) if canonical[i] == i]
+    shingle_sets = {i: shingles(texts[i]) for i in unique}
+    hasher = MinHasher()
+    bands, rows = lsh_params(threshold)
+    buckets = [{} for _ in range(bands)]
+
+    for i in unique:
+        signature = hasher.signature(shingle_sets[i])
+        match = None
+        candidates = set()
+        for band, bucket in enumerate(buckets):
+            key = signature[band * rows:(band + 1) * rows].tobytes()
+            candidates.update(bucket.get(key, ()))
+        for j in sorted(candidates):
+            if jaccard(shingle_sets[i], shingle_sets[j]) >= threshold:
+                match = j
+                break
+
+        if match is not None:
+            canonical[i] = match
+            continue
+        # Only kept texts are indexed, so every match is a canonical one
+        for band, bucket in enumerate(buckets):
+            key = signature[band * rows:(band + 1) * rows].tobytes()
+            bucket.setdefault(key, []).append(i)
+
+    return canonical
+
+
+def dedupe_records(records: Iterable[dict], threshold: Optional[float] = None) -> List[dict]:
+    """
+    Drop near-duplicate {"id", "document", "metadata"} records.
+
+    Needs the whole set of records at once (they're compared pairwise), so
+    this buffers its input; kept records carry their duplicates' provenance.
+    """
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    records = list(records)
+    canonical = find_duplicates([r["document"] for r in records], threshold)
+
+    duplicates = {}
+    for i, keep in enumerate(canonical):
+        if keep != i:
+            duplicates.setdefault(keep, []).append(records[i])
+
+    kept = []
+    for i, record in enumerate(records):
+        if canonical[i] != i:
+            continue
+        merged = duplicates.get(i)
+        if merged:
+            # Chroma metadata values must be scalars, so lists are joined
+            record = {**record, "metadata": {
+                **record["metadata"],
+                "duplicate_ids": ",".join(r["id"] for r in merged),
+                "duplicate_pages": ",".join(str(r["metadata"].get("page", "")) for r in merged),
+                "duplicate_count": len(merged),
+            }}
+        kept.append(record)
+
+    metrics.incr("dedup.dropped", len(records) - len(kept))
+    if len(kept) < len(records):
+        print(f"   🧹 Dropped {len(records) - len(kept)} near-duplicate chunks (threshold {threshold})")
+    return kept
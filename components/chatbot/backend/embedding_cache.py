@@ -0,0 +1,123 @@
+"""
+Content-addressed persistent embedding cache
+
+Embeddings are stored in SQLite keyed by sha256(model name + text), so a
+reseed only pays for texts that have never been embedded with the current
+model. Vectors are stored as raw float32 blobs.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import numpy as np
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from config import CHROMA_DIR, EMBEDDING_MODEL
+
+CACHE_PATH = CHROMA_DIR / "embedding_cache.sqlite"
+
+
+def content_hash(text: str) -> str:
+    """Stable hash of a document's text (stored as content_hash metadata)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def metadata_hash(metadata: dict) -> str:
+    """Stable hash of a record's metadata (stored as metadata_hash, which it excludes)"""
+    fields = {k: v for k, v in metadata.items() if k != "metadata_hash"}
+    return hashlib.sha256(json.dumps(fields, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def cache_key(text: str, model: str = EMBEDDING_MODEL) -> str:
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache, safe to share between threads"""
+
+    def __init__(self, path: Path = CACHE_PATH, model: str = EMBEDDING_MODEL):
+        self.path = Path(path)
+        self.model = model
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look up texts, returns a vector or None per text"""
+        keys = [cache_key(t, self.model) for t in texts]
+        found = {}
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+
+        vectors = [found.get(k) for k in keys]
+        hits = sum(v is not None for v in vectors)
+        self.hits += hits
+        self.misses += len(vectors) - hits
+        return vectors
+
+    def put_many(self, texts: List[str], embeddings: np.ndarray):
+        """Store float32 embeddings for texts"""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        rows = [
+            (cache_key(t, self.model), self.model, int(matrix.shape[1]), matrix[i].tobytes())
+            for i, t in enumerate(texts)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self._conn.commit()
+
+    def embed(
+        self,
+        texts: List[str],
+        embed_fn: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Embed texts, calling embed_fn only for texts missing from the cache.
+
+        Returns an (len(texts), dim) float32 matrix in input order.
+        """
+        cached = self.get_many(texts)
+        missing = [i for i, v in enumerate(cached) if v is None]
+
+        fresh = None
+        if missing:
+            fresh = np.asarray(embed_fn([texts[i] for i in missing]), dtype=np.float32)
+            self.put_many([texts[i] for i in missing], fresh)
+
+        dim = fresh.shape[1] if fresh is not None else len(cached[0]) if cached else 0
+        matrix = np.empty((len(texts), dim), dtype=np.float32)
+        for i, vector in enumerate(cached):
+            if vector is not None:
+                matrix[i] = vector
+        if missing:
+            matrix[missing] = fresh
+        return matrix
@@ -0,0 +1,458 @@
+"""
+Embeddings for the ShareMatch AI Chatbot
+
+Every backend implements the Embedder interface (embed(texts) -> float32
+matrix of L2-normalized rows); get_embedder() picks one from
+config.EMBEDDING_BACKEND:
+
+- HttpEmbedder: HuggingFace Inference Providers API (default)
+- OnnxEmbedder: ONNX Runtime on CPU, weights from EMBEDDING_MODEL_PATH
+- SentenceTransformerEmbedder: sentence-transformers on CPU
+
+HTTP backend
+
+Uses sentence-transformers/all-MiniLM-L6-v2 (384 dimensions) through the
+router.huggingface.co feature-extraction pipeline. The endpoint accepts a list
+of inputs, so texts are sent in batches and pooled/normalized in one
+vectorized NumPy operation per batch.
+
+Requests go through a shared AdaptiveRateLimiter and are retried with jittered
+exponential backoff on 429/5xx, honouring Retry-After, so bulk jobs run as
+fast as the provider allows.
+"""
+
+import os
+import time
+import numpy as np
+import requests
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from config import (
+    EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, HF_TOKEN,
+    EMBEDDING_RATE_LIMIT, EMBEDDING_MAX_RATE_LIMIT, EMBEDDING_WORKERS, EMBEDDING_MAX_RETRIES,
+    EMBEDDING_BACKEND, EMBEDDING_MODEL_PATH, EMBEDDING_PROCESSES,
+)
+import metrics
+from rate_limiter import AdaptiveRateLimiter, backoff_delay, parse_retry_after
+from vectors import normalize_rows
+
+# New HuggingFace router endpoint (as of 2025)
+# Format: /hf-inference/models/{model_id}/pipeline/feature-extraction
+# HF_INFERENCE_BASE can point at a stand-in server (see benchmarks/)
+HF_INFERENCE_BASE = os.getenv("HF_INFERENCE_BASE", "https://router.huggingface.co")
+HF_API_URL = f"{HF_INFERENCE_BASE}/hf-inference/models/{EMBEDDING_MODEL}/pipeline/feature-extraction"
+
+# Texts per feature-extraction request / local inference batch
+EMBEDDING_BATCH_SIZE = 32
+
+# all-MiniLM-L6-v2 was trained on sequences of at most 256 word pieces
+LOCAL_MAX_SEQ_LENGTH = 256
+
+# Local backends must match the HTTP backend's vectors at least this closely
+REFERENCE_MIN_SIMILARITY = 0.99
+
+# Status codes that mean "slow down / try again"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+_session = requests.Session()
+
+# Shared by every embedding worker in the process
+rate_limiter = AdaptiveRateLimiter(rate=EMBEDDING_RATE_LIMIT, max_rate=EMBEDDING_MAX_RATE_LIMIT)
+
+
+def pool_embeddings(result, normalize: bool = True) -> np.ndarray:
+    """
+    Turn a batched feature-extraction response into an (n, dim) float32 matrix.
+
+    Handles both pooled output (one vector per input) and token-level output
+    (one vector per token, ragged across inputs). Token-level output is padded
+    into a (n, tokens, dim) tensor and mean-pooled with a mask in one step.
+    """
+    if not isinstance(result, list) or not result:
+        raise Exception(f"Unexpected response format: {type(result)}")
+
+    first = result[0]
+    if not isinstance(first, list):
+        # Single flat embedding
+        matrix = np.asarray([result], dtype=np.float32)
+    elif first and not isinstance(first[0], list):
+        # Already pooled - one vector per input
+        matrix = np.asarray(result, dtype=np.float32)
+    else:
+        # Token-level - masked mean pooling over padded tokens
+        lengths = np.fromiter((len(tokens) for tokens in result), dtype=np.int64, count=len(result))
+        dim = len(first[0])
+        padded = np.zeros((len(result), int(lengths.max()), dim), dtype=np.float32)
+        for i, tokens in enumerate(result):
+            padded[i, :len(tokens)] = tokens
+        mask = np.arange(padded.shape[1])[None, :] < lengths[:, None]
+        matrix = (padded * mask[:, :, None]).sum(axis=1) / np.maximum(lengths, 1)[:, None]
+
+    if normalize:
+        matrix = normalize_rows(matrix)
+
+    return np.ascontiguousarray(matrix, dtype=np.float32)
+
+
+def _retry_delay(response: Optional[requests.Response], attempt: int) -> float:
+    """How long to wait before the next attempt"""
+    if response is not None:
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+        if response.status_code == 503:
+            # Model is loading - the API tells us roughly how long
+            try:
+                return float(response.json().get("estimated_time", 0)) or backoff_delay(attempt)
+            except (ValueError, AttributeError):
+                pass
+    return backoff_delay(attempt)
+
+
+def _request_embeddings(inputs, max_retries: int = EMBEDDING_MAX_RETRIES) -> list:
+    """POST one feature-extraction request, rate limited and retried on throttling/5xx"""
+    headers = {
+        "Authorization": f"Bearer {HF_TOKEN}",
+        "Content-Type": "application/json"
+    }
+
+    # Request with options for proper embedding output
+    payload = {
+        "inputs": inputs,
+        "options": {
+            "wait_for_model": True,
+            "use_cache": True
+        }
+    }
+
+    texts = 1 if isinstance(inputs, str) else len(inputs)
+
+    for attempt in range(max_retries + 1):
+        if attempt:
+            metrics.incr("embedding.retries")
+        with metrics.span("embedding.rate_limit_wait"):
+            rate_limiter.acquire()
+        response = None
+        with metrics.span("embedding.request") as span:
+            try:
+                response = _session.post(HF_API_URL, headers=headers, json=payload)
+                span.set(status=response.status_code, bytes_received=len(response.content))
+            except requests.RequestException as e:
+                span.set(status="connection_error")
+                if attempt == max_retries:
+                    raise Exception(f"HuggingFace API request failed: {e}")
+                time.sleep(backoff_delay(attempt))
+                continue
+
+        if response.status_code == 200:
+            rate_limiter.on_success()
+            metrics.incr("embedding.texts", texts, backend="http")
+            return response.json()
+
+        if response.status_code not in RETRYABLE_STATUS or attempt == max_retries:
+            break
+
+        delay = _retry_delay(response, attempt)
+        if response.status_code in (429, 503):
+            if response.status_code == 503:
+                print("      ⏳ Model loading, waiting...")
+            rate_limiter.on_throttle(delay)
+            metrics.incr("embedding.throttled", status=response.status_code)
+        time.sleep(delay)
+
+    raise Exception(f"HuggingFace API error ({response.status_code}): {response.text}")
+
+
+def generate_embeddings(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> np.ndarray:
+    """
+    Generate embeddings for many texts, batch_size texts per request.
+
+    Returns an (len(texts), dim) float32 matrix of L2-normalized rows.
+    """
+    matrix = np.empty((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+    for start in range(0, len(texts), batch_size):
+        batch = list(texts[start:start + batch_size])
+        pooled = pool_embeddings(_request_embeddings(batch))
+        if len(pooled) != len(batch):
+            raise Exception(f"Expected {len(batch)} embeddings, got {len(pooled)}")
+        matrix[start:start + len(batch)] = pooled
+
+    return matrix
+
+
+def generate_embedding(text: str) -> np.ndarray:
+    """Generate a single float32 embedding"""
+    return generate_embeddings([text])[0]
+
+
+def length_sorted_batches(texts: List[str], batch_size: int) -> List[List[int]]:
+    """
+    Dynamic batching: group texts of similar length so each batch pads as
+    little as possible. Returns lists of indices into texts.
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+class Embedder:
+    """Embedding backend interface"""
+
+    name = "base"
+    model_name = EMBEDDING_MODEL
+    dimensions = EMBEDDING_DIMENSIONS
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed texts, returns an (len(texts), dim) float32 matrix of L2-normalized rows"""
+        raise NotImplementedError
+
+    def embed_one(self, text: str) -> np.ndarray:
+        return self.embed([text])[0]
+
+    def close(self):
+        pass
+
+
+class HttpEmbedder(Embedder):
+    """HuggingFace Inference Providers API (rate limited, see rate_limiter.py)"""
+
+    name = "http"
+
+    def __init__(self, batch_size: int = EMBEDDING_BATCH_SIZE):
+        self.batch_size = batch_size
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return generate_embeddings(texts, self.batch_size)
+
+
+class LocalEmbedder(Embedder):
+    """
+    Base for CPU backends: dynamic batching, plus an optional process pool
+    that spreads batches across cores (each worker loads its own model).
+    """
+
+    def __init__(
+        self,
+        model_path: Path = EMBEDDING_MODEL_PATH,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        processes: int = EMBEDDING_PROCESSES,
+    ):
+        self.model_path = Path(model_path)
+        if not self.model_path.exists():
+            raise Exception(f"Local embedding model not found: {self.model_path}")
+        self.batch_size = batch_size
+        self.processes = processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+    def _timed_batch(self, texts: List[str]) -> np.ndarray:
+        metrics.incr("embedding.texts", len(texts), backend=self.name)
+        with metrics.span("embedding.local_batch", backend=self.name):
+            return self._embed_batch(texts)
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        matrix = np.empty((len(texts), self.dimensions), dtype=np.float32)
+        batches = length_sorted_batches(texts, self.batch_size)
+
+        if self.processes > 0 and len(batches) > 1:
+            metrics.incr("embedding.local_pool_batches", len(batches), backend=self.name)
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    initializer=_init_worker,
+                    initargs=(type(self), self.model_path, self.batch_size),
+                )
+            results = self._pool.map(_worker_embed, [[texts[i] for i in batch] for batch in batches])
+        else:
+            results = (self._timed_batch([texts[i] for i in batch]) for batch in batches)
+
+        for batch, result in zip(batches, results):
+            matrix[batch] = result
+        return matrix
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+class OnnxEmbedder(LocalEmbedder):
+    """
+    ONNX Runtime on CPU.
+
+    EMBEDDING_MODEL_PATH must contain model.onnx and tokenizer.json (an ONNX
+    export of all-MiniLM-L6-v2, e.g. from optimum-cli export onnx).
+    """
+
+    name = "onnx"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        options = onnxruntime.SessionOptions()
+        if self.processes > 0:
+            # Cores are shared between worker processes
+            options.intra_op_num_threads = max(1, (os.cpu_count() or 1) // self.processes)
+        self.session = onnxruntime.InferenceSession(
+            str(self.model_path / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_path / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=LOCAL_MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+
+        inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            inputs["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, inputs)[0]
+
+        # Masked mean pooling, same as sentence-transformers
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        return np.ascontiguousarray(normalize_rows(pooled), dtype=np.float32)
+
+
+class SentenceTransformerEmbedder(LocalEmbedder):
+    """sentence-transformers (PyTorch) on CPU"""
+
+    name = "sentence-transformers"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(str(self.model_path), device="cpu")
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=len(texts), normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+
+
+# Per-process model for LocalEmbedder's process pool
+_worker_embedder: Optional[LocalEmbedder] = None
+
+
+def _init_worker(embedder_class, model_path: Path, batch_size: int):
+    global _worker_embedder
+    _worker_embedder = embedder_class(model_path=model_path, batch_size=batch_size, processes=0)
+
+
+def _worker_embed(texts: List[str]) -> np.ndarray:
+    return _worker_embedder._embed_batch(texts)
+
+
+EMBEDDERS = {
+    "http": HttpEmbedder,
+    "onnx": OnnxEmbedder,
+    "sentence-transformers": SentenceTransformerEmbedder,
+}
+
+_embedder: Optional[Embedder] = None
+
+
+def get_embedder(backend: Optional[str] = None) -> Embedder:
+    """Embedder for the configured backend (shared instance for the default)"""
+    global _embedder
+    if backend is not None and backend != EMBEDDING_BACKEND:
+        return EMBEDDERS[backend]()
+    if _embedder is None:
+        if EMBEDDING_BACKEND not in EMBEDDERS:
+            raise ValueError(f"Unknown EMBEDDING_BACKEND: {EMBEDDING_BACKEND} (expected one of {list(EMBEDDERS)})")
+        _embedder = EMBEDDERS[EMBEDDING_BACKEND]()
+    return _embedder
+
+
+def check_embedder(
+    embedder: Embedder,
+    texts: List[str],
+    reference: Optional[dict] = None,
+    min_similarity: float = REFERENCE_MIN_SIMILARITY,
+) -> List[str]:
+    """
+    Sanity-check a backend on texts: EMBEDDING_DIMENSIONS-dim unit rows, the
+    same vectors batched and one at a time and, given a reference recorded by
+    record_reference() (e.g. from the HTTP backend), a cosine similarity of
+    at least min_similarity to it for every text. Returns the problems found.
+    """
+    problems = []
+    matrix = np.asarray(embedder.embed(texts), dtype=np.float32)
+    if matrix.shape != (len(texts), EMBEDDING_DIMENSIONS):
+        return [f"Expected {len(texts)} x {EMBEDDING_DIMENSIONS} embeddings, got {matrix.shape}"]
+
+    norms = np.linalg.norm(matrix, axis=1)
+    if not np.allclose(norms, 1.0, atol=1e-3):
+        problems.append(f"Rows are not unit length (norms {norms.min():.4f}-{norms.max():.4f})")
+
+    # Padding must not leak into the pooled vectors
+    singles = np.stack([np.asarray(embedder.embed([text]), dtype=np.float32)[0] for text in texts])
+    drift = float(np.abs(singles - matrix).max())
+    if drift > 1e-3:
+        problems.append(f"Batched and single-text embeddings differ by up to {drift:.4f}")
+
+    if reference is not None:
+        if reference.get("model") != EMBEDDING_MODEL:
+            problems.append(f"Reference is for {reference.get('model')}, not {EMBEDDING_MODEL}")
+        expected = dict(zip(reference["texts"], reference["embeddings"]))
+        missing = [text for text in texts if text not in expected]
+        if missing:
+            problems.append(f"{len(missing)} texts have no reference embedding, e.g. {missing[0]!r}")
+        for text, vector in zip(texts, matrix):
+            if text in expected:
+                similarity = float(normalize_rows(np.asarray(expected[text], dtype=np.float32)) @ vector)
+                if similarity < min_similarity:
+                    problems.append(f"Similarity {similarity:.4f} to the reference for {text!r}")
+    return problems
+
+
+def record_reference(embedder: Embedder, texts: List[str]) -> dict:
+    """Embeddings to compare other backends against with check_embedder()"""
+    return {
+        "model": EMBEDDING_MODEL,
+        "backend": embedder.name,
+        "texts": list(texts),
+        "embeddings": np.asarray(embedder.embed(texts), dtype=np.float32).round(6).tolist(),
+    }
+
+
+def embed_batches(
+    texts: List[str],
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    max_workers: int = EMBEDDING_WORKERS,
+    embed_fn: Callable[[List[str]], np.ndarray] = generate_embeddings,
+):
+    """
+    Embed texts on a bounded thread pool, one batch per task.
+
+    Returns (matrix, failures): rows of failed batches are left as NaN and each
+    failure is reported as {"start", "end", "error"} so callers never drop
+    documents silently.
+    """
+    matrix = np.full((len(texts), EMBEDDING_DIMENSIONS), np.nan, dtype=np.float32)
+    failures = []
+
+    def run(start: int):
+        batch = list(texts[start:start + batch_size])
+        try:
+            matrix[start:start + len(batch)] = embed_fn(batch)
+        except Exception as e:
+            failures.append({"start": start, "end": start + len(batch), "error": str(e)})
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        list(pool.map(run, range(0, len(texts), batch_size)))
+
+    failures.sort(key=lambda f: f["start"])
+    return matrix, failures
@@ -0,0 +1,252 @@
+"""
+Hybrid lexical + vector retrieval
+
+An in-memory BM25 inverted index over the corpus, with extra weight for the
+curated keywords in videos.json ("login", "sign up", ...). Lexical and vector
+rankings are merged with reciprocal-rank fusion (RRF).
+
+When the lexical ranking alone is decisive (the top document matched a
+curated keyword and clearly beats the runner-up), the query is answered
+without embedding it at all. The index is built from the local replica;
+without one, hybrid retrieval is plain vector retrieval.
+"""
+
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from local_index import matches_filter
+
+# BM25 parameters
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Score added per token of a matched curated keyword phrase
+KEYWORD_BOOST = 4.0
+
+# Fast path: top lexical score must be this many times the runner-up's
+FAST_PATH_MARGIN = 2.0
+
+# Candidates taken from each ranking before fusion, and the RRF constant
+FUSION_CANDIDATES = 20
+RRF_K = 60
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i in is it me my of on or "
+    "the to what when where which who why will with you your".split()
+)
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def terms(text: str) -> List[str]:
+    """Tokens used for BM25 (stopwords removed)"""
+    return [t for t in tokenize(text) if t not in STOPWORDS]
+
+
+def empty_result() -> dict:
+    return {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]], "scores": [[]]}
+
+
+class BM25Index:
+    """
+    BM25 inverted index with curated keyword boosts.
+
+    Postings hold precomputed per-document BM25 weights, so a query is one
+    numpy scatter-add per query term.
+    """
+
+    def __init__(
+        self,
+        ids: List[str],
+        documents: List[str],
+        metadatas: List[dict],
+        keywords: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = [m or {} for m in metadatas]
+        self._positions = {doc_id: i for i, doc_id in enumerate(self.ids)}
+        self._mask_cache = {}
+
+        # term -> (document indexes, BM25 weights)
+        doc_terms = [terms(doc) for doc in self.documents]
+        lengths = np.array([len(t) for t in doc_terms], dtype=np.float32)
+        avg_length = float(lengths.mean()) if len(lengths) and lengths.mean() > 0 else 1.0
+
+        counts = {}
+        for i, tokens in enumerate(doc_terms):
+            for token in tokens:
+                per_doc = counts.setdefault(token, {})
+                per_doc[i] = per_doc.get(i, 0) + 1
+
+        total = len(self.ids)
+        self.postings = {}
+        for token, per_doc in counts.items():
+            docs = np.fromiter(per_doc.keys(), dtype=np.int64, count=len(per_doc))
+            tf = np.fromiter(per_doc.values(), dtype=np.float32, count=len(per_doc))
+            idf = math.log(1 + (total - len(per_doc) + 0.5) / (len(per_doc) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[docs] / avg_length)
+            self.postings[token] = (docs, idf * tf * (BM25_K1 + 1) / (tf + norm))
+
+        # keyword phrase (as a token tuple) -> document indexes
+        self.phrases = {}
+        for doc_id, phrases in (keywords or {}).items():
+            if doc_id not in self._positions:
+                continue
+            for phrase in phrases:
+                tokens = tuple(tokenize(phrase))
+                if tokens:
+                    self.phrases.setdefault(tokens, []).append(self._positions[doc_id])
+        self.max_phrase_length = max((len(p) for p in self.phrases), default=0)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, records: Iterable[dict], keywords: Optional[Dict[str, List[str]]] = None) -> "BM25Index":
+        records = list(records)
+        return cls(
+            [r["id"] for r in records],
+            [r["document"] for r in records],
+            [r["metadata"] for r in records],
+            keywords,
+        )
+
+    def _mask(self, where: dict) -> np.ndarray:
+        key = repr(where)
+        mask = self._mask_cache.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (matches_filter(m, where) for m in self.metadatas), dtype=bool, count=len(self.ids)
+            )
+            self._mask_cache[key] = mask
+        return mask
+
+    def score(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (total score, keyword weight) per document"""
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for token in set(terms(query)):
+            posting = self.postings.get(token)
+            if posting is not None:
+                np.add.at(scores, posting[0], posting[1])
+
+        keyword_weight = np.zeros(len(self.ids), dtype=np.float32)
+        tokens = tokenize(query)
+        matched = set()
+        for n in range(1, self.max_phrase_length + 1):
+            for start in range(len(tokens) - n + 1):
+                phrase = tuple(tokens[start:start + n])
+                if phrase in self.phrases and phrase not in matched:
+                    matched.add(phrase)
+                    np.add.at(keyword_weight, self.phrases[phrase], n)
+
+        return scores + KEYWORD_BOOST * keyword_weight, keyword_weight
+
+    def search(self, query: str, n_results: int = 4, where: Optional[dict] = None) -> dict:
+        """
+        Top documents by lexical score, shaped like a Chroma query response.
+
+        There is no vector distance, so distances are None; the result also
+        has "scores" and a "confident" flag (see FAST_PATH_MARGIN).
+        """
+        if not self.ids:
+            return {**empty_result(), "confident": False}
+
+        scores, keyword_weight = self.score(query)
+        if where:
+            scores[~self._mask(where)] = 0.0
+            keyword_weight[~self._mask(where)] = 0.0
+
+        k = min(n_results, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        order = top[np.argsort(-scores[top], kind="stable")]
+        order = order[scores[order] > 0]
+
+        result = {
+            "ids": [[self.ids[i] for i in order]],
+            "documents": [[self.documents[i] for i in order]],
+            "metadatas": [[self.metadatas[i] for i in order]],
+            "distances": [[None] * len(order)],
+            "scores": [[float(scores[i]) for i in order]],
+            "confident": False,
+        }
+
+        if len(order):
+            best = order[0]
+            others = np.delete(scores, best)
+            runner_up = float(others.max()) if len(others) else 0.0
+            others_keywords = np.delete(keyword_weight, best)
+            result["confident"] = bool(
+                keyword_weight[best] > 0
+                and (not len(others_keywords) or keyword_weight[best] > others_keywords.max())
+                and scores[best] >= FAST_PATH_MARGIN * runner_up
+            )
+        return result
+
+
+def reciprocal_rank_fusion(results: List[dict], n_results: int = 4, rrf_k: int = RRF_K) -> dict:
+    """
+    Merge Chroma-shaped results (first query of each) by RRF: every document
+    scores sum(1 / (rrf_k + rank)) over the rankings it appears in.
+
+    Distances come from the first result that has one for the document.
+    """
+    fused = {}
+    for result in results:
+        rows = zip(result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0])
+        for rank, (doc_id, document, metadata, distance) in enumerate(rows, 1):
+            entry = fused.setdefault(doc_id, {"document": document, "metadata": metadata, "distance": None, "score": 0.0})
+            entry["score"] += 1.0 / (rrf_k + rank)
+            if entry["distance"] is None and distance is not None:
+                entry["distance"] = distance
+
+    ranked = sorted(fused.items(), key=lambda item: -item[1]["score"])[:n_results]
+    return {
+        "ids": [[doc_id for doc_id, _ in ranked]],
+        "documents": [[e["document"] for _, e in ranked]],
+        "metadatas": [[e["metadata"] for _, e in ranked]],
+        "distances": [[e["distance"] for _, e in ranked]],
+        "scores": [[e["score"] for _, e in ranked]],
+    }
+
+
+def load_keywords() -> Dict[str, List[str]]:
+    """Curated keywords from videos.json, keyed by record ID"""
+    from records import load_video_documents
+
+    return {f"video_{video['id']}": video.get("keywords", []) for video in load_video_documents()}
+
+
+_index = None
+_index_source = None  # (collection version, local replica) the index was built from
+
+
+def get_hybrid_index() -> Optional[BM25Index]:
+    """
+    The lexical index over the synced local replica (exactly what's in
+    Chroma), rebuilt after a reseed or a new export.
+
+    None if there is no replica: building from the corpus would mean loading
+    and splitting the PDFs inside a request, so callers use plain vector
+    retrieval instead (run manage.py export to enable hybrid search).
+    """
+    global _index, _index_source
+    from local_index import get_local_index
+    from query_cache import read_collection_version
+
+    local = get_local_index()
+    if local is None:
+        return None
+
+    source = (read_collection_version(), local)
+    if _index is None or source[0] != _index_source[0] or source[1] is not _index_source[1]:
+        _index = BM25Index(local.ids, local.documents, local.metadatas, load_keywords())
+        _index_source = source
+    return _index
@@ -1,21 +1,191 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from config import DATA_PATH, CHUNK_SIZE, CHUNK_OVERLAP
+from config import PDF_PATHS, CHUNK_SIZE, CHUNK_OVERLAP, LOADER_PROCESSES
+import metrics
+from parsed_cache import ParsedTextCache, file_hash
+
+# Pages extracted and split per process-pool task
+PAGES_PER_TASK = 8
+
+# Below this many pages the process pool costs more than it saves
+MIN_PARALLEL_PAGES = 16
+
+
+def get_splitter(chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    return RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap
+    )
+
+
+def _extract_page_text(page) -> str:
+    """Extract text the same way PyPDFLoader does (plain mode, no images)"""
+    import pypdf
+
+    if pypdf.__version__.startswith("3"):
+        return page.extract_text().strip()
+    return page.extract_text(extraction_mode="plain").strip()
 
 
-def load_and_split_documents():
+def _load_and_split_pages(
+    path: str,
+    start: int,
+    end: int,
+    base_metadata: dict,
+    page_labels: List[str],
+    chunk_size: int = CHUNK_SIZE,
+    chunk_overlap: int = CHUNK_OVERLAP,
+):
     """
-    Loads PDF FAQs and splits them into chunks.
+    Extract and split pages [start, end) of one PDF.
+
+    Runs in a worker process; returns (pages, chunks, extract seconds, split
+    seconds) of those pages in order. Metrics recorded in a worker would be
+    lost, so the timings travel back with the result.
     """
-    print("📄 Loading PDF...")
-    loader = PyPDFLoader(str(DATA_PATH))
-    documents = loader.load()
+    import pypdf
+
+    reader = pypdf.PdfReader(path)
+    splitter = get_splitter(chunk_size, chunk_overlap)
+    pages, chunks = [], []
+    extract_seconds = split_seconds = 0.0
+    for page_number in range(start, end):
+        started = time.perf_counter()
+        page = Document(
+            page_content=_extract_page_text(reader.pages[page_number]),
+            metadata={**base_metadata, "page": page_number, "page_label": page_labels[page_number]},
+        )
+        extracted = time.perf_counter()
+        pages.append(page)
+        chunks.extend(splitter.split_documents([page]))
+        extract_seconds += extracted - started
+        split_seconds += time.perf_counter() - extracted
+    return pages, chunks, extract_seconds, split_seconds
+
+
+def _plan_tasks(path: Path) -> list:
+    """One (path, start, end, metadata, labels) task per PAGES_PER_TASK pages, in page order"""
+    import pypdf
+
+    reader = pypdf.PdfReader(str(path))
+    total_pages = len(reader.pages)
+    if not total_pages:
+        return []
+
+    # PyPDFLoader's document-level metadata (producer, title, source, ...)
+    first_page = next(PyPDFLoader(str(path)).lazy_load())
+    base_metadata = {k: v for k, v in first_page.metadata.items() if k not in ("page", "page_label")}
+    page_labels = list(reader.page_labels)
+
+    return [
+        (str(path), start, min(start + PAGES_PER_TASK, total_pages), base_metadata, page_labels)
+        for start in range(0, total_pages, PAGES_PER_TASK)
+    ]
 
-    print("✂️ Splitting text...")
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP
-    )
 
-    chunks = splitter.split_documents(documents)
+def _parse_pdf(path: Path, processes: int, chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP):
+    """
+    Yields (pages, chunks) per page range of one PDF, in page order.
+
+    Records the whole parse as load_and_split_documents.parse and the time
+    spent extracting text and splitting it (summed over pages, in whichever
+    process did the work) as .extract and .split.
+    """
+    with metrics.span("load_and_split_documents.plan"):
+        tasks = [(*task, chunk_size, chunk_overlap) for task in _plan_tasks(path)]
+    total_pages = sum(task[2] - task[1] for task in tasks)
+    metrics.incr("loader.pages", total_pages)
+
+    parallel = processes > 1 and total_pages >= MIN_PARALLEL_PAGES
+    mode = "pool" if parallel else "serial"
+    with metrics.span("load_and_split_documents.parse", mode=mode):
+        if parallel:
+            pool = ProcessPoolExecutor(max_workers=min(processes, len(tasks)))
+            # map() returns results in submission order, i.e. page order
+            results = pool.map(_load_and_split_pages, *zip(*tasks))
+        else:
+            pool = None
+            results = (_load_and_split_pages(*task) for task in tasks)
+        try:
+            for pages, chunks, extract_seconds, split_seconds in results:
+                metrics.observe("load_and_split_documents.extract", extract_seconds, mode=mode)
+                metrics.observe("load_and_split_documents.split", split_seconds, mode=mode)
+                yield pages, chunks
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+
+def iter_split_documents(
+    paths: Optional[Sequence[Path]] = None,
+    processes: Optional[int] = None,
+    cache: Optional[ParsedTextCache] = None,
+    use_cache: bool = True,
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    update_cache: bool = True,
+) -> Iterator[Document]:
+    """
+    Yields the chunks of one or more PDFs, in document and page order.
+
+    Page text extraction and splitting run in a process pool (page ranges per
+    task) when there are enough pages; chunks and their page metadata are the
+    same as PyPDFLoader + RecursiveCharacterTextSplitter would produce.
+
+    Parsed pages and chunks are cached per PDF (see parsed_cache.py): an
+    unchanged PDF is read back from the cache, and changed chunk settings
+    only re-split the cached pages. chunk_size/chunk_overlap default to the
+    configured CHUNK_SIZE/CHUNK_OVERLAP. update_cache=False reads the cache
+    without writing to it (for one-off chunk settings, e.g. evaluations).
+    """
+    paths = [Path(p) for p in (paths or PDF_PATHS)]
+    processes = LOADER_PROCESSES if processes is None else processes
+    processes = processes or os.cpu_count() or 1
+    cache = cache or ParsedTextCache()
+    chunk_size = CHUNK_SIZE if chunk_size is None else chunk_size
+    chunk_overlap = CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+
+    for path in paths:
+        digest = file_hash(path) if use_cache else None
+        pages, chunks = cache.load(path, digest, chunk_size, chunk_overlap) if use_cache else (None, None)
+
+        if chunks is not None:
+            metrics.incr("loader.cache_hits", kind="chunks")
+        elif pages is not None:
+            metrics.incr("loader.cache_hits", kind="pages")
+            with metrics.span("load_and_split_documents.split", mode="cached_pages"):
+                chunks = get_splitter(chunk_size, chunk_overlap).split_documents(pages)
+            if update_cache:
+                cache.save(path, digest, chunk_size, chunk_overlap, None, chunks)
+        else:
+            metrics.incr("loader.cache_misses")
+            pages, chunks = [], []
+            for page_batch, chunk_batch in _parse_pdf(path, processes, chunk_size, chunk_overlap):
+                pages.extend(page_batch)
+                chunks.extend(chunk_batch)
+            if use_cache and update_cache:
+                cache.save(path, digest, chunk_size, chunk_overlap, pages, chunks)
+
+        metrics.incr("loader.chunks", len(chunks))
+        yield from chunks
+
+
+def load_and_split_documents(
+    paths: Optional[Sequence[Path]] = None,
+    processes: Optional[int] = None,
+    use_cache: bool = True,
+):
+    """
+    Loads PDF FAQs and splits them into chunks.
+    """
+    with metrics.span("load_and_split_documents"):
+        print("📄 Loading and splitting PDF...")
+        chunks = list(iter_split_documents(paths, processes, use_cache=use_cache))
     return chunks
@@ -0,0 +1,271 @@
+"""
+Local vector index replica for the ShareMatch AI Chatbot
+
+Syncs the Chroma Cloud collection into CHROMA_DIR as a float32 matrix
+(embeddings.npy) plus a records table (see vector_files.py), memory-maps the
+matrix and answers queries with vectorized cosine top-k in NumPy. The matrix can optionally be
+stored as float16 or int8 (see vectors.py) to shrink the replica.
+
+query_similar() returns the same shape as chroma_cloud.query_similar(), so
+the retriever can use it directly or fall back to it when the cloud is down.
+"""
+
+import json
+import os
+import threading
+import time
+import numpy as np
+from pathlib import Path
+from typing import List, Optional
+
+from config import CHROMA_DIR
+from vector_files import RECORDS_FILE, read_records, record_matrix, write_vector_files
+from vectors import dequantize, normalize_rows, quantize, scores as vector_scores, to_matrix
+
+EMBEDDINGS_FILE = "embeddings.npy"
+SCALES_FILE = "scales.npy"
+MANIFEST_FILE = "manifest.json"
+
+
+def matches_filter(metadata: dict, where: dict) -> bool:
+    """Evaluate a Chroma-style metadata filter against one record"""
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, c) for c in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_filter(metadata, c) for c in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > expected:
+                    return False
+                if op == "$gte" and not value >= expected:
+                    return False
+                if op == "$lt" and not value < expected:
+                    return False
+                if op == "$lte" and not value <= expected:
+                    return False
+    return True
+
+
+class LocalIndex:
+    """Memory-mapped local replica of the Chroma collection"""
+
+    def __init__(self, path: Path = CHROMA_DIR):
+        self.path = Path(path)
+        self.embeddings: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self.ids: List[str] = []
+        self.documents: List[str] = []
+        self.metadatas: List[dict] = []
+        self.manifest: dict = {}
+        self._masks = {}
+        self._positions = None
+
+    def exists(self) -> bool:
+        # A replica written before the JSONL records table needs a fresh sync
+        return (self.path / MANIFEST_FILE).exists() and (self.path / RECORDS_FILE).exists()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def write(
+        self,
+        ids: List[str],
+        documents: List[str],
+        embeddings,
+        metadatas: List[dict],
+        extra: Optional[dict] = None,
+        dtype: str = "float32",
+    ):
+        """Write records to disk, replacing any existing replica atomically"""
+        matrix = normalize_rows(record_matrix(embeddings, len(ids)))
+        data, scales = quantize(matrix, dtype)
+
+        arrays = {EMBEDDINGS_FILE: data}
+        if scales is not None:
+            arrays[SCALES_FILE] = scales
+        manifest = {
+            "count": len(ids),
+            "dimensions": int(matrix.shape[1]),
+            "dtype": dtype,
+            "synced_at": time.time(),
+            **(extra or {}),
+        }
+        write_vector_files(self.path, arrays, ids, documents, metadatas, MANIFEST_FILE, manifest)
+        self.embeddings = None
+
+    def sync(self, client=None, page_size: Optional[int] = None, dtype: str = "float32") -> int:
+        """Pull the whole collection from Chroma Cloud into the local replica"""
+        import chroma_cloud
+
+        client = client or chroma_cloud.get_store()
+        ids, documents, metadatas, embeddings = client.fetch_collection(page_size or chroma_cloud.PAGE_SIZE)
+        self.write(ids, documents, embeddings, metadatas, extra={"collection": client.collection}, dtype=dtype)
+        print(f"   💾 Synced {len(ids)} documents to local index at {self.path}")
+        return len(ids)
+
+    def import_snapshot(self, snapshot_path: Path, dtype: str = "float32") -> int:
+        """Build the replica from a collection snapshot instead of the cloud"""
+        from chroma_cloud import read_snapshot
+
+        snapshot = read_snapshot(snapshot_path)
+        extra = {"collection": snapshot["manifest"].get("collection"), "snapshot": str(snapshot_path)}
+        self.write(snapshot["ids"], snapshot["documents"], snapshot["embeddings"], snapshot["metadatas"],
+                   extra=extra, dtype=dtype)
+        return len(snapshot["ids"])
+
+    def load(self) -> "LocalIndex":
+        """Memory-map the matrix and load the records"""
+        with open(self.path / MANIFEST_FILE, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+
+        self.ids, self.documents, self.metadatas = read_records(self.path)
+
+        self.embeddings = np.load(self.path / EMBEDDINGS_FILE, mmap_mode="r")
+        self.scales = None
+        if self.manifest.get("dtype") == "int8":
+            self.scales = np.load(self.path / SCALES_FILE)
+        self._masks = {}
+        self._positions = None
+        return self
+
+    def embedding(self, doc_id: str) -> Optional[np.ndarray]:
+        """Stored (unit-length) vector of one record, None if it isn't in the replica"""
+        if self.embeddings is None:
+            self.load()
+        if self._positions is None:
+            self._positions = {record_id: i for i, record_id in enumerate(self.ids)}
+        row = self._positions.get(doc_id)
+        if row is None:
+            return None
+        scales = self.scales[row:row + 1] if self.scales is not None else None
+        return dequantize(self.embeddings[row:row + 1], scales)[0]
+
+    def _mask(self, where: dict) -> np.ndarray:
+        """Boolean row mask for a metadata filter (cached per filter)"""
+        key = json.dumps(where, sort_keys=True)
+        if key not in self._masks:
+            self._masks[key] = np.fromiter(
+                (matches_filter(m, where) for m in self.metadatas), dtype=bool, count=len(self.metadatas)
+            )
+        return self._masks[key]
+
+    def query_similar(
+        self,
+        query_embedding: List[float],
+        n_results: int = 4,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+    ) -> dict:
+        """
+        Cosine top-k search, shaped like a Chroma query response.
+
+        Distances are squared L2 between unit vectors, 2 * (1 - cosine
+        similarity): Chroma's default "l2" space, so results from the replica
+        and the cloud collection are on the same scale. Matched
+        vectors are only returned if include contains "embeddings".
+        """
+        return self.query_batch([query_embedding], n_results, where, include)
+
+    def query_batch(
+        self,
+        query_embeddings: List[List[float]],
+        n_results: int = 4,
+        where: Optional[dict] = None,
+        include: Optional[List[str]] = None,
+    ) -> dict:
+        """Cosine top-k for several queries at once (one matrix multiply)"""
+        if self.embeddings is None:
+            self.load()
+
+        queries = normalize_rows(to_matrix(query_embeddings))
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        with_embeddings = "embeddings" in (include or ())
+        if with_embeddings:
+            result["embeddings"] = []
+
+        if len(self.ids) == 0:
+            for _ in range(len(queries)):
+                for key in result:
+                    result[key].append([])
+            return result
+
+        if queries.shape[1] != self.embeddings.shape[1]:
+            raise Exception(
+                f"Local index stores {self.embeddings.shape[1]}-dim vectors but the query has "
+                f"{queries.shape[1]}: the replica is stale, run manage.py export"
+            )
+        scores = vector_scores(queries, self.embeddings, self.scales)
+        if where:
+            scores[:, ~self._mask(where)] = -np.inf
+
+        k = min(n_results, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        for row, candidates in enumerate(top):
+            order = candidates[np.argsort(-scores[row, candidates])]
+            order = order[np.isfinite(scores[row, order])]
+            result["ids"].append([self.ids[i] for i in order])
+            result["documents"].append([self.documents[i] for i in order])
+            result["metadatas"].append([self.metadatas[i] for i in order])
+            result["distances"].append([float(2.0 * (1.0 - scores[row, i])) for i in order])
+            if with_embeddings:
+                rows = dequantize(self.embeddings[order], self.scales[order] if self.scales is not None else None)
+                result["embeddings"].append(rows.tolist())
+
+        return result
+
+
+# Shared index used by the retriever, reloaded when the replica is rewritten
+_lock = threading.Lock()
+_index: Optional[LocalIndex] = None
+_index_mtime = None
+
+
+def get_local_index(path: Path = CHROMA_DIR) -> Optional[LocalIndex]:
+    """
+    The local replica, returns None if it has never been synced.
+
+    The manifest is written last, so its mtime changing means another process
+    (e.g. manage.py export) replaced the replica; it is then loaded again.
+    """
+    global _index, _index_mtime
+    index = LocalIndex(path)
+    try:
+        mtime = os.stat(index.path / MANIFEST_FILE).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _lock:
+        if mtime != _index_mtime or _index is None:
+            _index = index.load() if mtime is not None and index.exists() else None
+            _index_mtime = mtime
+        return _index
+
+
+def sync_local_index(dtype: str = "float32", snapshot_path: Optional[Path] = None) -> int:
+    """Refresh the on-disk replica from Chroma Cloud (or from a snapshot)"""
+    global _index
+    if snapshot_path is not None:
+        count = LocalIndex().import_snapshot(snapshot_path, dtype=dtype)
+    else:
+        count = LocalIndex().sync(dtype=dtype)
+    _index = None
+    return count
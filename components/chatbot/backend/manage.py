@@ -0,0 +1,277 @@
+"""
+Maintenance CLI for the ShareMatch chatbot backend
+
+Usage:
+    python manage.py count [--min N]            # documents in Chroma Cloud (cron health check)
+    python manage.py query "how do I sign up?" [-k 4] [--where type=video] [--hybrid | --diverse] [--json]
+    python manage.py clear [--where type=text] [--yes]
+    python manage.py seed [--incremental | --resume | ...]   # see seed_to_chroma_cloud.py
+    python manage.py export [--dtype float16]   # refresh the local replica in chroma_db/
+    python manage.py export --snapshot backups/faq   # snapshot the collection
+    python manage.py import backups/faq [--keep-extra] [--yes]   # restore it
+    python manage.py answers [--questions path.json]   # rebuild the canonical answer index
+    python manage.py embedder --record [--backend http]   # record reference embeddings
+    python manage.py embedder [--backend onnx]   # check a local backend offline against them
+
+Heavy modules (LangChain, pypdf, numpy, local embedding backends) are only
+imported by the subcommands that need them, so count/query start quickly.
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def parse_where(pairs) -> dict:
+    """["type=video", "access_level=public"] -> Chroma where filter"""
+    if not pairs:
+        return None
+    conditions = []
+    for pair in pairs:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected key=value, got {pair!r}")
+        conditions.append({key: value})
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def refresh_answers():
+    """Re-retrieve the canonical answer index after the collection changed"""
+    from canonical_answers import refresh_answer_index
+
+    try:
+        index = refresh_answer_index()
+    except Exception as e:
+        print(f"⚠️ Could not refresh the canonical answer index ({e}), run manage.py answers", file=sys.stderr)
+        return
+    if index:
+        print(f"📌 Refreshed canonical answers for {index.manifest['questions']} questions")
+
+
+def cmd_count(args) -> int:
+    from chroma_cloud import get_collection_count
+
+    count = get_collection_count()
+    print(count)
+    if args.min is not None and count < args.min:
+        print(f"❌ Expected at least {args.min} documents", file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_query(args) -> int:
+    from embeddings import get_embedder
+    from retriever import retrieve, retrieve_diverse, retrieve_hybrid
+
+    retrieve_fn = retrieve_hybrid if args.hybrid else retrieve_diverse if args.diverse else retrieve
+    embedder = get_embedder()
+    try:
+        result = retrieve_fn(args.text, embedder.embed_one, n_results=args.k, where=parse_where(args.where))
+    finally:
+        embedder.close()
+
+    if args.json:
+        print(json.dumps(result, default=float, indent=2))
+        return 0
+
+    hits = zip(result["ids"][0], result["documents"][0], result["metadatas"][0], result["distances"][0])
+    for rank, (doc_id, document, metadata, distance) in enumerate(hits, 1):
+        distance = "-" if distance is None else f"{distance:.4f}"
+        print(f"{rank}. {doc_id}  distance={distance}  source={(metadata or {}).get('source', '')}")
+        print(f"   {' '.join(document.split())[:200]}")
+    return 0
+
+
+def cmd_clear(args) -> int:
+    from chroma_cloud import clear_collection
+    from query_cache import bump_collection_version
+
+    where = parse_where(args.where)
+    if not args.yes:
+        target = f"documents matching {where}" if where else "ALL documents"
+        if input(f"⚠️ Delete {target} from Chroma Cloud? [y/N] ").strip().lower() != "y":
+            print("Aborted")
+            return 1
+
+    deleted = clear_collection(where=where)
+    bump_collection_version()
+    refresh_answers()
+    print(f"🗑️ Deleted {deleted} documents")
+    return 0
+
+
+def cmd_seed(args) -> int:
+    import seed_to_chroma_cloud
+
+    seed_to_chroma_cloud.main(args.seed_args)
+    return 0
+
+
+def cmd_export(args) -> int:
+    if args.snapshot:
+        from chroma_cloud import export_collection
+
+        manifest = export_collection(args.snapshot)
+        print(f"💾 Wrote a snapshot of {manifest['count']} documents to {args.snapshot}")
+        return 0
+
+    from local_index import sync_local_index
+    from query_cache import bump_collection_version
+
+    count = sync_local_index(dtype=args.dtype, snapshot_path=args.from_snapshot)
+    # Cached results (and, in local mode, canonical answers) may predate the new replica
+    bump_collection_version()
+    if args.from_snapshot:
+        print("⚠️ The local index no longer mirrors Chroma Cloud, canonical answers are off until the next refresh",
+              file=sys.stderr)
+    else:
+        refresh_answers()
+    print(f"💾 Exported {count} documents to the local index")
+    return 0
+
+
+def cmd_import(args) -> int:
+    from chroma_cloud import import_collection
+    from query_cache import bump_collection_version
+
+    if not args.yes and not args.keep_extra:
+        prompt = f"⚠️ Replace the collection with the snapshot in {args.snapshot}? [y/N] "
+        if input(prompt).strip().lower() != "y":
+            print("Aborted")
+            return 1
+
+    count = import_collection(args.snapshot, prune=not args.keep_extra)
+    bump_collection_version()
+    refresh_answers()
+    print(f"📥 Restored {count} documents")
+    return 0
+
+
+def cmd_answers(args) -> int:
+    from canonical_answers import build_answer_index
+    from embeddings import get_embedder
+
+    embedder = get_embedder()
+    try:
+        index = build_answer_index(embedder.embed, args.questions)
+    finally:
+        embedder.close()
+
+    manifest = index.manifest
+    print(f"💾 Stored results for {manifest['questions']} canonical questions "
+          f"({manifest['phrasings']} phrasings, {len(index.documents)} documents, {index.size_bytes() / 1024:.1f} KB)")
+    return 0
+
+
+def cmd_embedder(args) -> int:
+    from config import EMBEDDING_REFERENCE_PATH
+    from canonical_answers import load_canonical_questions
+
+    backend = args.backend or os.getenv("EMBEDDING_BACKEND", "http")
+    if backend != "http" and not args.record:
+        # Local weights only: fail instead of silently downloading a model
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+    from embeddings import get_embedder, check_embedder, record_reference
+
+    texts = [text for item in load_canonical_questions() for text in [item["question"], *item.get("paraphrases", [])]]
+    path = args.reference or EMBEDDING_REFERENCE_PATH
+    embedder = get_embedder(backend)
+    try:
+        if args.record:
+            path.write_text(json.dumps(record_reference(embedder, texts)), encoding="utf-8")
+            print(f"💾 Recorded {len(texts)} {embedder.name} embeddings to {path}")
+            return 0
+
+        reference = json.loads(path.read_text(encoding="utf-8")) if path.exists() else None
+        if reference is None:
+            print(f"⚠️ No reference embeddings at {path}, only checking shape and consistency")
+        problems = check_embedder(embedder, texts, reference)
+    finally:
+        embedder.close()
+
+    for problem in problems:
+        print(f"❌ {problem}", file=sys.stderr)
+    if problems:
+        return 1
+    print(f"✅ {embedder.name} embeddings look right for {len(texts)} texts")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="ShareMatch chatbot maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    count = commands.add_parser("count", help="Print the number of documents in the collection")
+    count.add_argument("--min", type=int, help="Exit with status 1 if there are fewer documents")
+    count.set_defaults(handler=cmd_count)
+
+    query = commands.add_parser("query", help="Retrieve the documents closest to a question")
+    query.add_argument("text", help="Question to search for")
+    query.add_argument("-k", type=int, default=4, help="Number of results")
+    query.add_argument("--where", nargs="*", metavar="KEY=VALUE", help="Metadata filters")
+    mode = query.add_mutually_exclusive_group()
+    mode.add_argument("--hybrid", action="store_true", help="BM25 + keywords fused with vector search")
+    mode.add_argument("--diverse", action="store_true", help="Over-fetch and re-rank with MMR")
+    query.add_argument("--json", action="store_true", help="Print the raw result")
+    query.set_defaults(handler=cmd_query)
+
+    clear = commands.add_parser("clear", help="Delete documents from the collection")
+    clear.add_argument("--where", nargs="*", metavar="KEY=VALUE", help="Only delete matching documents")
+    clear.add_argument("--yes", action="store_true", help="Don't ask for confirmation")
+    clear.set_defaults(handler=cmd_clear)
+
+    seed = commands.add_parser("seed", help="Run seed_to_chroma_cloud.py (extra arguments are passed through)")
+    seed.set_defaults(handler=cmd_seed)
+
+    export = commands.add_parser("export", help="Refresh the local index replica, or write a snapshot")
+    export.add_argument("--dtype", choices=["float32", "float16", "int8"], default="float32",
+                        help="Storage type of the local index vectors")
+    source = export.add_mutually_exclusive_group()
+    source.add_argument("--snapshot", type=Path, metavar="DIR", help="Write a collection snapshot to DIR instead")
+    source.add_argument("--from-snapshot", type=Path, metavar="DIR",
+                        help="Build the local index from a snapshot instead of Chroma Cloud")
+    export.set_defaults(handler=cmd_export)
+
+    restore = commands.add_parser("import", help="Restore the collection from a snapshot (no embedding calls)")
+    restore.add_argument("snapshot", type=Path, help="Snapshot directory written by export --snapshot")
+    restore.add_argument("--keep-extra", action="store_true", help="Keep documents that are not in the snapshot")
+    restore.add_argument("--yes", action="store_true", help="Don't ask for confirmation")
+    restore.set_defaults(handler=cmd_import)
+
+    answers = commands.add_parser("answers", help="Rebuild the canonical-question answer index")
+    answers.add_argument("--questions", type=Path, help="Curated questions JSON (default: data/canonical_questions.json)")
+    answers.set_defaults(handler=cmd_answers)
+
+    embedder = commands.add_parser("embedder", help="Check an embedding backend against reference embeddings")
+    embedder.add_argument("--backend", choices=["http", "onnx", "sentence-transformers"],
+                          help="Backend to check (default: EMBEDDING_BACKEND)")
+    embedder.add_argument("--reference", type=Path, help="Reference file (default: data/embedding_reference.json)")
+    embedder.add_argument("--record", action="store_true", help="Write the backend's embeddings as the reference")
+    embedder.set_defaults(handler=cmd_embedder)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    # Unknown options are only allowed for seed, which hands them to the seeder
+    args, extra = parser.parse_known_args(argv)
+    if extra and args.command != "seed":
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    args.seed_args = extra
+    try:
+        return args.handler(args)
+    except Exception as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
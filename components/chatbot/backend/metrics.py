@@ -0,0 +1,212 @@
+"""
+Lightweight timing and counter instrumentation for the chatbot backend
+
+Disabled by default. When disabled, span() hands back a shared no-op context
+manager and incr()/observe() return immediately, so instrumented code pays a
+single flag check.
+
+Enable with CHATBOT_METRICS=1 or metrics.enable(), then export with
+export_jsonl() (one event per line) or export_prometheus() (node-exporter
+textfile format).
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+# Raw events kept in memory for export_jsonl (oldest are dropped first)
+MAX_EVENTS = 100_000
+
+_enabled = os.getenv("CHATBOT_METRICS", "").lower() in ("1", "true", "yes")
+_lock = threading.Lock()
+_events = deque(maxlen=MAX_EVENTS)
+_counters = {}  # (name, labels) -> value
+_timings = {}   # (name, labels) -> [count, sum, max]
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    with _lock:
+        _events.clear()
+        _counters.clear()
+        _timings.clear()
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def incr(name: str, value: float = 1, **labels):
+    """Add to a counter"""
+    if not _enabled:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+        _events.append({"type": "counter", "name": name, "value": value, "ts": time.time(), **labels})
+
+
+def observe(name: str, seconds: float, **labels):
+    """Record a duration (and any extra labels, e.g. status or bytes)"""
+    if not _enabled:
+        return
+    # Byte counts are summed as counters rather than split into label values
+    sizes = {k: labels.pop(k) for k in ("bytes_sent", "bytes_received") if k in labels}
+    key = (name, _label_key(labels))
+    with _lock:
+        timing = _timings.setdefault(key, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+        for size_name, size in sizes.items():
+            size_key = (f"{name}.{size_name}", key[1])
+            _counters[size_key] = _counters.get(size_key, 0) + (size or 0)
+        _events.append({"type": "span", "name": name, "seconds": seconds, "ts": time.time(), **labels, **sizes})
+
+
+class Span:
+    """Times a block; labels can be added inside it with span.set(...)"""
+
+    __slots__ = ("name", "labels", "_started")
+
+    def __init__(self, name: str, labels: dict):
+        self.name = name
+        self.labels = labels
+
+    def set(self, **labels):
+        self.labels.update(labels)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.labels.setdefault("error", exc_type.__name__)
+        observe(self.name, time.perf_counter() - self._started, **self.labels)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **labels):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str, **labels):
+    """Context manager timing a block of code"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(name, labels)
+
+
+def snapshot() -> dict:
+    """Aggregated counters and timings"""
+    with _lock:
+        return {
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in _counters.items()
+            ],
+            "timings": [
+                {"name": name, "labels": dict(labels), "count": t[0], "sum": t[1], "max": t[2]}
+                for (name, labels), t in _timings.items()
+            ],
+        }
+
+
+def export_jsonl(path: Path, append: bool = False) -> int:
+    """Write raw events as JSON lines, returns the number written"""
+    with _lock:
+        events = list(_events)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a" if append else "w", encoding="utf-8") as f:
+        for event in events:
+            f.write(json.dumps(event, default=str) + "\n")
+    return len(events)
+
+
+def _prom_name(name: str) -> str:
+    return "chatbot_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def _prom_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for k, v in sorted(labels.items()))
+    return "{" + ",".join(escaped) + "}"
+
+
+def export_prometheus(path: Path):
+    """Write aggregates in Prometheus textfile format (atomically)"""
+    data = snapshot()
+    # Every sample of a metric family has to follow its TYPE line as one group
+    counters = sorted(data["counters"], key=lambda item: item["name"])
+    timings = sorted(data["timings"], key=lambda item: item["name"])
+    lines = []
+    seen = set()
+
+    for counter in counters:
+        name = _prom_name(counter["name"]) + "_total"
+        if name not in seen:
+            lines.append(f"# TYPE {name} counter")
+            seen.add(name)
+        lines.append(f"{name}{_prom_labels(counter['labels'])} {counter['value']}")
+
+    for timing in timings:
+        name = _prom_name(timing["name"]) + "_seconds"
+        if name not in seen:
+            lines.append(f"# TYPE {name} summary")
+            seen.add(name)
+        labels = _prom_labels(timing["labels"])
+        lines.append(f"{name}_count{labels} {timing['count']}")
+        lines.append(f"{name}_sum{labels} {timing['sum']:.6f}")
+
+    # Maxima are separate gauge families, each written as one group
+    for timing in timings:
+        name = _prom_name(timing["name"]) + "_max_seconds"
+        if name not in seen:
+            lines.append(f"# TYPE {name} gauge")
+            seen.add(name)
+        lines.append(f"{name}{_prom_labels(timing['labels'])} {timing['max']:.6f}")
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def export(directory: Path, prefix: str = "chatbot"):
+    """Write <prefix>.jsonl and <prefix>.prom into a directory"""
+    directory = Path(directory)
+    count = export_jsonl(directory / f"{prefix}.jsonl")
+    export_prometheus(directory / f"{prefix}.prom")
+    return count
@@ -0,0 +1,144 @@
+"""
+On-disk cache of parsed PDF text, keyed by the source file's hash
+
+For each PDF the cache keeps:
+    <name>.pages.jsonl    extracted page text (valid while the file hash matches)
+    <name>.chunks.jsonl   split chunks (valid while hash, chunk size and overlap match)
+    <name>.manifest.json  file hash, page/chunk counts, chunk size and overlap
+
+A repeat seed with an unchanged PDF skips parsing and splitting entirely; a
+run with a new CHUNK_SIZE/CHUNK_OVERLAP only re-splits the cached pages.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from config import CHROMA_DIR
+
+CACHE_DIR = CHROMA_DIR / "parsed"
+
+# Bump when the artifact layout or extraction changes
+CACHE_FORMAT = 1
+
+
+def file_hash(path: Path) -> str:
+    """sha256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_atomic(path: Path, text: str):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _dump_documents(documents: List[Document]) -> str:
+    return "".join(
+        json.dumps({"text": doc.page_content, "metadata": doc.metadata}, ensure_ascii=False) + "\n"
+        for doc in documents
+    )
+
+
+def _load_documents(path: Path) -> List[Document]:
+    with open(path, encoding="utf-8") as f:
+        return [
+            Document(page_content=row["text"], metadata=row["metadata"])
+            for row in map(json.loads, f)
+        ]
+
+
+class ParsedTextCache:
+    """Page and chunk artifacts for PDFs, one set of files per source path"""
+
+    def __init__(self, directory: Path = CACHE_DIR):
+        self.directory = Path(directory)
+
+    def _file(self, source: Path, kind: str) -> Path:
+        # Same-named PDFs in different folders get separate artifacts
+        source = Path(source).resolve()
+        path_hash = hashlib.sha1(str(source).encode("utf-8")).hexdigest()[:8]
+        return self.directory / f"{source.stem}-{path_hash}.{kind}"
+
+    def manifest(self, source: Path) -> dict:
+        try:
+            return json.loads(self._file(source, "manifest.json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def load(
+        self,
+        source: Path,
+        digest: str,
+        chunk_size: int,
+        chunk_overlap: int,
+    ) -> Tuple[Optional[List[Document]], Optional[List[Document]]]:
+        """
+        Returns (pages, chunks) for a PDF.
+
+        pages is None when the file changed (or was never cached); chunks is
+        None as well when the chunking settings differ from the cached ones.
+        """
+        manifest = self.manifest(source)
+        if manifest.get("format") != CACHE_FORMAT or manifest.get("sha256") != digest:
+            return None, None
+
+        try:
+            if manifest.get("chunk_size") == chunk_size and manifest.get("chunk_overlap") == chunk_overlap:
+                chunks = _load_documents(self._file(source, "chunks.jsonl"))
+                if len(chunks) == manifest.get("chunks"):
+                    return None, chunks
+            pages = _load_documents(self._file(source, "pages.jsonl"))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None, None
+
+        if len(pages) != manifest.get("pages"):
+            return None, None
+        return pages, None
+
+    def save(
+        self,
+        source: Path,
+        digest: str,
+        chunk_size: int,
+        chunk_overlap: int,
+        pages: Optional[List[Document]],
+        chunks: List[Document],
+    ):
+        """Write the artifacts; pages=None keeps the already cached page text"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        manifest = {
+            "format": CACHE_FORMAT,
+            "source": str(Path(source).resolve()),
+            "sha256": digest,
+            "pages": len(pages) if pages is not None else self.manifest(source).get("pages"),
+            "chunk_size": chunk_size,
+            "chunk_overlap": chunk_overlap,
+            "chunks": len(chunks),
+        }
+
+        # Data files first, manifest last: a crash leaves a stale manifest
+        # whose counts or hash no longer match, never a half-read artifact
+        if pages is not None:
+            _write_atomic(self._file(source, "pages.jsonl"), _dump_documents(pages))
+        _write_atomic(self._file(source, "chunks.jsonl"), _dump_documents(chunks))
+        _write_atomic(self._file(source, "manifest.json"), json.dumps(manifest, indent=2))
+
+    def clear(self) -> int:
+        """Delete all artifacts, returns the number of files removed"""
+        removed = 0
+        if self.directory.exists():
+            for path in self.directory.iterdir():
+                if path.suffix in (".jsonl", ".json"):
+                    path.unlink()
+                    removed += 1
+        return removed
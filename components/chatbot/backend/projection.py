@@ -0,0 +1,173 @@
+"""
+Optional PCA dimensionality reduction for stored and query embeddings
+
+When EMBEDDING_REDUCED_DIMENSIONS is set, the seeder fits PCA on the corpus
+embeddings and persists the projection (mean + components) next to the local
+index. Documents are stored projected, and retriever.query_similar projects
+query embeddings with the same matrix, so the whole path searches the smaller
+vectors.
+
+A projection is only published if it keeps nearest neighbours intact: for a
+sample of corpus vectors used as queries, the top-k neighbours in the reduced
+space must overlap the full-dimension top-k by at least
+REDUCTION_MIN_RECALL on average.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from config import CHROMA_DIR, EMBEDDING_MODEL
+from vectors import normalize_rows
+
+PROJECTION_PATH = CHROMA_DIR / "projection.npz"
+# Projection being seeded; only published once the upload has finished
+PENDING_PROJECTION_PATH = CHROMA_DIR / "projection.pending.npz"
+
+# Neighbours compared by the recall check, and how many corpus vectors are used as queries
+RECALL_K = 4
+RECALL_SAMPLE = 500
+
+
+class Projection:
+    """PCA projection: x -> normalize((x - mean) @ components.T)"""
+
+    def __init__(self, mean: np.ndarray, components: np.ndarray, model: str = EMBEDDING_MODEL):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.model = model
+
+    @property
+    def dimensions(self) -> int:
+        return int(self.components.shape[0])
+
+    @property
+    def source_dimensions(self) -> int:
+        return int(self.components.shape[1])
+
+    @property
+    def id(self) -> str:
+        """Content hash, recorded in checkpoints so a resume never mixes projections"""
+        digest = hashlib.sha1(self.model.encode("utf-8"))
+        digest.update(self.mean.tobytes())
+        digest.update(self.components.tobytes())
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def fit(cls, matrix: np.ndarray, dimensions: int, model: str = EMBEDDING_MODEL) -> "Projection":
+        """Fit PCA on (normalized) corpus embeddings"""
+        matrix = normalize_rows(np.asarray(matrix, dtype=np.float32))
+        if dimensions >= matrix.shape[1]:
+            raise Exception(f"Reduced dimensions ({dimensions}) must be below {matrix.shape[1]}")
+        if len(matrix) <= dimensions:
+            raise Exception(f"Need more than {dimensions} documents to fit {dimensions} components, have {len(matrix)}")
+
+        mean = matrix.mean(axis=0)
+        # Rows of vt are the principal axes, by decreasing variance
+        _, _, vt = np.linalg.svd(matrix - mean, full_matrices=False)
+        components = vt[:dimensions]
+
+        # SVD signs are arbitrary; fix them so refits on the same data match
+        signs = np.sign(components[np.arange(dimensions), np.abs(components).argmax(axis=1)])
+        signs[signs == 0] = 1.0
+        return cls(mean, components * signs[:, None], model)
+
+    def apply(self, embeddings) -> np.ndarray:
+        """Project embeddings (one vector or a matrix) and re-normalize"""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        single = matrix.ndim == 1
+        matrix = normalize_rows(matrix.reshape(-1, self.source_dimensions))
+        reduced = normalize_rows((matrix - self.mean) @ self.components.T)
+        return reduced[0] if single else reduced
+
+    def save(self, path: Path = PROJECTION_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.tmp")
+        with open(tmp, "wb") as f:
+            np.savez(f, mean=self.mean, components=self.components, model=np.array(self.model))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path = PROJECTION_PATH) -> Optional["Projection"]:
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"], str(data["model"]))
+
+
+def topk_recall(matrix: np.ndarray, projection: Projection, k: int = RECALL_K,
+                sample: int = RECALL_SAMPLE, seed: int = 0) -> float:
+    """
+    Mean overlap between full-dimension and reduced top-k neighbours, using
+    (a sample of) the corpus vectors themselves as queries, self excluded.
+    """
+    full = normalize_rows(np.asarray(matrix, dtype=np.float32))
+    k = min(k, len(full) - 1)
+    if k < 1:
+        return 1.0
+    reduced = projection.apply(full)
+
+    rng = np.random.default_rng(seed)
+    queries = np.arange(len(full)) if len(full) <= sample else rng.choice(len(full), sample, replace=False)
+
+    def neighbours(vectors: np.ndarray) -> np.ndarray:
+        scores = vectors[queries] @ vectors.T
+        scores[np.arange(len(queries)), queries] = -np.inf
+        return np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    full_top, reduced_top = neighbours(full), neighbours(reduced)
+    overlap = [len(set(a) & set(b)) for a, b in zip(full_top, reduced_top)]
+    return float(np.mean(overlap)) / k
+
+
+# Active projection used for queries, reloaded when the file changes
+_lock = threading.Lock()
+_active = None
+_active_mtime = None
+
+
+def get_projection(path: Path = PROJECTION_PATH) -> Optional[Projection]:
+    """The published projection, or None when vectors are stored at full size"""
+    global _active, _active_mtime
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        mtime = None
+    with _lock:
+        if mtime != _active_mtime:
+            _active = Projection.load(path) if mtime is not None else None
+            _active_mtime = mtime
+        return _active
+
+
+def project_query(embedding, path: Path = PROJECTION_PATH):
+    """
+    Apply the published projection to a full-size query embedding (no-op
+    without one, or if the embedding is already reduced)
+    """
+    projection = get_projection(path)
+    if projection is None or len(embedding) != projection.source_dimensions:
+        return embedding
+    return projection.apply(embedding).tolist()
+
+
+def remove_projection(path: Path = PROJECTION_PATH):
+    """Unpublish: vectors are stored at full size again"""
+    if Path(path).exists():
+        Path(path).unlink()
+
+
+def publish_projection(projection: Optional[Projection], path: Path = PROJECTION_PATH,
+                       pending_path: Path = PENDING_PROJECTION_PATH):
+    """Make projection (None = full size) the one queries use, and drop the pending copy"""
+    if projection is not None:
+        projection.save(path)
+    else:
+        remove_projection(path)
+    remove_projection(pending_path)
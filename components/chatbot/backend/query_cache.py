@@ -0,0 +1,161 @@
+"""
+LRU + TTL cache for retrieval results
+
+FAQ traffic is dominated by a handful of repeated questions, so results are
+cached by normalized query text (skips the embedding call and the vector DB)
+or by a quantized query embedding (skips the vector DB).
+
+The seeder bumps a version marker in CHROMA_DIR whenever it rewrites the
+collection; every cache notices the new version and drops its entries.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+from config import CHROMA_DIR, QUERY_CACHE_SIZE, QUERY_CACHE_TTL
+
+VERSION_FILE = CHROMA_DIR / "collection.version"
+
+# Seconds between checks of the version marker
+VERSION_CHECK_INTERVAL = 1.0
+
+# Decimal places kept when hashing a query embedding
+EMBEDDING_KEY_DECIMALS = 4
+
+
+def bump_collection_version(path: Path = VERSION_FILE) -> str:
+    """Mark the collection as rewritten, invalidating every query cache"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    version = uuid.uuid4().hex
+    path.write_text(version, encoding="utf-8")
+    return version
+
+
+def read_collection_version(path: Path = VERSION_FILE) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace"""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def _filter_key(n_results: int, where: Optional[dict]) -> str:
+    return f"{n_results}|{json.dumps(where, sort_keys=True) if where else ''}"
+
+
+def text_key(text: str, n_results: int = 4, where: Optional[dict] = None) -> str:
+    """Cache key for a query text"""
+    return f"t|{normalize_query(text)}|{_filter_key(n_results, where)}"
+
+
+def embedding_key(embedding, n_results: int = 4, where: Optional[dict] = None) -> str:
+    """Cache key for a query embedding, quantized so float noise still hits"""
+    quantized = ",".join(f"{float(v):.{EMBEDDING_KEY_DECIMALS}f}" for v in embedding)
+    digest = hashlib.sha1(quantized.encode("utf-8")).hexdigest()
+    return f"e|{digest}|{_filter_key(n_results, where)}"
+
+
+class QueryCache:
+    """Thread-safe LRU cache with per-entry TTL and hit/miss counters"""
+
+    def __init__(
+        self,
+        max_size: int = QUERY_CACHE_SIZE,
+        ttl: float = QUERY_CACHE_TTL,
+        version_file: Optional[Path] = VERSION_FILE,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.version_file = version_file
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = read_collection_version(version_file) if version_file else None
+        self._version_checked_at = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self.version_file is None:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < VERSION_CHECK_INTERVAL:
+            return
+        self._version_checked_at = now
+        version = read_collection_version(self.version_file)
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._check_version()
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Shared cache used by the retriever
+_cache: Optional[QueryCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    global _cache
+    if _cache is None:
+        _cache = QueryCache()
+    return _cache
@@ -0,0 +1,102 @@
+"""
+Adaptive token-bucket rate limiter
+
+Shared by concurrent API workers. The bucket refills at `rate` tokens per
+second up to `burst`. A 429/503 (or a Retry-After header) halves the rate (once
+per cool-down, however many workers see it) and pauses every worker until the
+server's deadline; each success nudges the rate back up towards max_rate.
+The result runs as fast as the provider allows.
+
+max_rate defaults to the starting rate, in which case the limiter only backs
+off and recovers; pass a higher max_rate to let it probe above the start.
+"""
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AdaptiveRateLimiter:
+    """Thread-safe token bucket that slows down on throttling responses"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        min_rate: float = 0.1,
+        max_rate: Optional[float] = None,
+        increase: float = 0.1,
+    ):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.increase = increase
+
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cooldown_until = 0.0
+        self._lock = threading.Lock()
+
+        self.throttled = 0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._paused_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+
+    def on_success(self):
+        """Additive increase back towards max_rate"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        """
+        Multiplicative decrease, and pause everyone until Retry-After has passed.
+
+        Requests already in flight when the rate was cut report the same
+        overload, so the rate is halved at most once per cool-down: until the
+        pause ends plus one interval at the new rate.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.throttled += 1
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if now >= self._cooldown_until:
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._cooldown_until = max(self._paused_until, now) + 1.0 / self.rate
@@ -0,0 +1,91 @@
+"""
+Corpus records for the vector store
+
+Every document the seeder uploads (FAQ PDF chunks and video tutorials) as a
+{"id", "document", "metadata"} record, in a stable order. Shared by the seeder
+and the retrievers that need the raw corpus.
+"""
+
+import json
+from pathlib import Path
+from typing import Optional
+
+from config import VIDEOS_PATH
+from embedding_cache import content_hash
+
+
+def load_video_documents():
+    """
+    Load video tutorial documents from videos.json
+    Returns list of dicts with content and metadata
+    """
+    if not VIDEOS_PATH.exists():
+        print(f"   ⚠️ Videos file not found: {VIDEOS_PATH}")
+        return []
+    
+    with open(VIDEOS_PATH, 'r', encoding='utf-8') as f:
+        videos = json.load(f)
+    
+    return videos
+
+
+def iter_pdf_records(chunks):
+    """
+    Turn PDF chunks into {"id", "document", "metadata"} records.
+
+    IDs are <pdf stem>_chunk_<index within that PDF>, e.g. faq_chunk_0.
+    """
+    indexes = {}
+    for chunk in chunks:
+        source = Path(chunk.metadata.get("source", "faq.pdf"))
+        i = indexes[source] = indexes.get(source, -1) + 1
+        yield {
+            "id": f"{source.stem}_chunk_{i}",
+            "document": chunk.page_content,
+            "metadata": {
+                "source": source.name,
+                "type": "text",
+                "page": chunk.metadata.get("page", 0),
+                "chunk_index": i,
+                "access_level": "public",  # FAQ is public product info (prompt handles topic restrictions)
+                "content_hash": content_hash(chunk.page_content),
+            },
+        }
+
+
+def iter_video_records(videos):
+    """Turn videos.json entries into {"id", "document", "metadata"} records"""
+    for video in videos:
+        yield {
+            "id": f"video_{video['id']}",
+            "document": video["content"],
+            "metadata": {
+                "source": "videos.json",
+                "type": "video",
+                "video_id": video["id"],
+                "r2_file_name": video.get("r2_file_name", ""),
+                "video_title": video["title"],
+                "access_level": video.get("access_level", "public"),  # Default to public for videos
+                "content_hash": content_hash(video["content"]),
+            },
+        }
+
+
+def iter_records(
+    chunk_size: Optional[int] = None,
+    chunk_overlap: Optional[int] = None,
+    update_cache: bool = True,
+):
+    """
+    Stage 1: load/split/dedup - every record of the corpus, in a stable order.
+
+    chunk_size/chunk_overlap override the configured PDF chunking;
+    update_cache=False leaves the parsed-text cache as it is.
+    """
+    # LangChain/pypdf are only imported once records are actually needed
+    from loader import iter_split_documents
+    from dedup import dedupe_records
+
+    chunks = iter_split_documents(chunk_size=chunk_size, chunk_overlap=chunk_overlap, update_cache=update_cache)
+    yield from dedupe_records(iter_pdf_records(chunks))
+    yield from iter_video_records(load_video_documents())
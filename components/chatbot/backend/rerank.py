@@ -0,0 +1,103 @@
+"""
+Local re-ranking of an over-fetched candidate set
+
+The vector store is asked for more candidates than needed (FETCH_K, with
+their embeddings) in a single request, then maximal marginal relevance (MMR)
+picks the final results: each pick maximizes
+
+    lambda * sim(query, doc) - (1 - lambda) * max sim(doc, already picked)
+
+so near-duplicate chunks no longer fill every slot. Optional quotas cap how
+many results may share a metadata value (e.g. at most 2 per access_level).
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from vectors import normalize_rows
+
+# Candidates fetched per query before re-ranking
+FETCH_K = 20
+
+# 1.0 = pure relevance, 0.0 = pure diversity
+MMR_LAMBDA = 0.5
+
+RESULT_KEYS = ("ids", "documents", "metadatas", "distances")
+
+
+def mmr(
+    query_embedding,
+    embeddings,
+    n_results: int = 4,
+    lambda_mult: float = MMR_LAMBDA,
+    allowed: Optional[np.ndarray] = None,
+    groups: Optional[List[np.ndarray]] = None,
+    limits: Optional[List[int]] = None,
+) -> List[int]:
+    """
+    Indexes of the MMR selection, in pick order.
+
+    groups/limits express quotas: groups[j][i] is candidate i's group ID for
+    quota j, and at most limits[j] picks may share a group ID.
+    """
+    candidates = normalize_rows(np.asarray(embeddings, dtype=np.float32))
+    if not len(candidates):
+        return []
+    query = normalize_rows(np.asarray(query_embedding, dtype=np.float32).reshape(-1))
+
+    relevance = candidates @ query
+    similarity = candidates @ candidates.T
+    max_similarity = np.full(len(candidates), -np.inf, dtype=np.float32)
+    available = np.ones(len(candidates), dtype=bool) if allowed is None else allowed.copy()
+    groups = groups or []
+    used = [dict() for _ in groups]
+
+    picks = []
+    while len(picks) < n_results and available.any():
+        # No redundancy penalty for the first pick
+        redundancy = np.where(np.isfinite(max_similarity), max_similarity, 0.0)
+        score = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        score[~available] = -np.inf
+        pick = int(np.argmax(score))
+
+        picks.append(pick)
+        available[pick] = False
+        max_similarity = np.maximum(max_similarity, similarity[pick])
+
+        # Close any group whose quota is now used up
+        for group_ids, limit, counts in zip(groups, limits or [], used):
+            group = group_ids[pick]
+            counts[group] = counts.get(group, 0) + 1
+            if counts[group] >= limit:
+                available &= group_ids != group
+
+    return picks
+
+
+def rerank_result(
+    result: dict,
+    query_embedding,
+    n_results: int = 4,
+    lambda_mult: float = MMR_LAMBDA,
+    quotas: Optional[Dict[str, int]] = None,
+) -> dict:
+    """
+    Re-rank the first row of a Chroma query response fetched with
+    include=[..., "embeddings"]. Returns a response without the embeddings.
+
+    quotas maps a metadata key to the most results allowed per value, e.g.
+    {"access_level": 2, "type": 3}.
+    """
+    embeddings = (result.get("embeddings") or [[]])[0]
+    metadatas = [m or {} for m in result["metadatas"][0]]
+
+    groups, limits = [], []
+    for key, limit in (quotas or {}).items():
+        values = [str(m.get(key)) for m in metadatas]
+        _, group_ids = np.unique(values, return_inverse=True) if values else ([], np.array([], dtype=np.int64))
+        groups.append(np.asarray(group_ids).reshape(-1))
+        limits.append(limit)
+
+    picks = mmr(query_embedding, embeddings, n_results, lambda_mult, groups=groups, limits=limits)
+    return {key: [[result[key][0][i] for i in picks]] for key in RESULT_KEYS}
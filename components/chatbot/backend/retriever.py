@@ -1,5 +1,236 @@
-def get_retriever(vectorstore):
+from typing import Callable, List, Optional
+
+from config import RETRIEVAL_BACKEND, CLOUD_QUERY_TIMEOUT
+
+
+def get_retriever(vectorstore, diverse: bool = False):
+    if diverse:
+        # Over-fetch and re-rank with MMR so near-duplicates don't fill every slot
+        from rerank import FETCH_K, MMR_LAMBDA
+        return vectorstore.as_retriever(
+            search_type="mmr",
+            search_kwargs={"k": 4, "fetch_k": FETCH_K, "lambda_mult": MMR_LAMBDA}
+        )
     return vectorstore.as_retriever(
         search_type="similarity",
         search_kwargs={"k": 4}  # More context for better answers
     )
+
+
+_cloud_client = None
+
+
+def _get_cloud_client():
+    """
+    Chroma client with a short timeout so a slow cloud triggers the fallback.
+
+    With CHROMA_ACCESS_SHARDING, an access_level condition in the where filter
+    selects the shard(s) to query instead of filtering the full collection.
+    """
+    global _cloud_client
+    if _cloud_client is None:
+        from chroma_cloud import CHROMA_ACCESS_SHARDING, ChromaCloudClient, ShardedChromaClient
+        client_class = ShardedChromaClient if CHROMA_ACCESS_SHARDING else ChromaCloudClient
+        _cloud_client = client_class(timeout=CLOUD_QUERY_TIMEOUT, max_retries=0)
+    return _cloud_client
+
+
+def query_similar(
+    query_embedding: List[float],
+    n_results: int = 4,
+    where: Optional[dict] = None
+) -> dict:
+    """
+    Retrieve similar documents using the configured backend (cached).
+
+    In "cloud" mode, errors and timeouts fall back to the local replica
+    (if it has been synced). In "local" mode the cloud is never contacted.
+    Queries matching a canonical question are answered from the precomputed
+    answer index (see canonical_answers.py) without either.
+    """
+    import metrics
+    from canonical_answers import lookup_answer
+    from projection import project_query
+    from query_cache import get_query_cache, embedding_key
+
+    result = lookup_answer(query_embedding, n_results, where)
+    if result is not None:
+        metrics.incr("retriever.canonical_hit")
+        return result
+
+    # Stored vectors may be PCA-reduced (see projection.py)
+    query_embedding = project_query(query_embedding)
+    cache = get_query_cache()
+    key = embedding_key(query_embedding, n_results, where)
+    result = cache.get(key)
+    if result is None:
+        result = _query_backend(query_embedding, n_results, where)
+        cache.set(key, result)
+    return result
+
+
+def retrieve(
+    query_text: str,
+    embed: Callable[[str], List[float]],
+    n_results: int = 4,
+    where: Optional[dict] = None
+) -> dict:
+    """
+    Retrieve documents for a query text.
+
+    Repeated questions are answered from the query cache without calling
+    embed() or the vector store.
+    """
+    from query_cache import get_query_cache, text_key
+
+    cache = get_query_cache()
+    key = text_key(query_text, n_results, where)
+    result = cache.get(key)
+    if result is None:
+        result = query_similar(embed(query_text), n_results, where)
+        cache.set(key, result)
+    return result
+
+
+def query_diverse(
+    query_embedding: List[float],
+    n_results: int = 4,
+    where: Optional[dict] = None,
+    fetch_k: Optional[int] = None,
+    lambda_mult: Optional[float] = None,
+    quotas: Optional[dict] = None
+) -> dict:
+    """
+    Over-fetch fetch_k candidates (one request) and re-rank them locally with
+    MMR, optionally capping results per metadata value (see rerank.py).
+    """
+    from projection import project_query
+    from query_cache import get_query_cache, embedding_key
+    from rerank import FETCH_K, MMR_LAMBDA, rerank_result
+
+    query_embedding = project_query(query_embedding)
+    fetch_k = max(n_results, fetch_k or FETCH_K)
+    lambda_mult = MMR_LAMBDA if lambda_mult is None else lambda_mult
+
+    cache = get_query_cache()
+    key = f"m|{fetch_k}|{lambda_mult}|{sorted((quotas or {}).items())}|" + embedding_key(query_embedding, n_results, where)
+    result = cache.get(key)
+    if result is None:
+        candidates = _query_backend(
+            query_embedding, fetch_k, where, include=["documents", "metadatas", "distances", "embeddings"]
+        )
+        result = rerank_result(candidates, query_embedding, n_results, lambda_mult, quotas)
+        cache.set(key, result)
+    return result
+
+
+def retrieve_diverse(
+    query_text: str,
+    embed: Callable[[str], List[float]],
+    n_results: int = 4,
+    where: Optional[dict] = None,
+    **rerank_options
+) -> dict:
+    """retrieve() with MMR re-ranking over an over-fetched candidate set"""
+    return query_diverse(embed(query_text), n_results, where, **rerank_options)
+
+
+def retrieve_hybrid(
+    query_text: str,
+    embed: Callable[[str], List[float]],
+    n_results: int = 4,
+    where: Optional[dict] = None
+) -> dict:
+    """
+    BM25 + curated keywords fused with vector results (see hybrid_retriever.py).
+
+    Queries the keyword index settles on its own skip the embedding call; if
+    they match fewer than n_results documents, the rest are the replica's
+    nearest neighbours of the top hit (see _fill_from_neighbours).
+    Lexical-only hits have a distance of None. Without a local replica to
+    build the keyword index from, this is plain query_similar().
+    """
+    import metrics
+    from hybrid_retriever import FUSION_CANDIDATES, get_hybrid_index, reciprocal_rank_fusion
+    from query_cache import get_query_cache, text_key
+
+    cache = get_query_cache()
+    key = "h|" + text_key(query_text, n_results, where)
+    result = cache.get(key)
+    if result is not None:
+        return result
+
+    index = get_hybrid_index()
+    if index is None:
+        metrics.incr("retriever.hybrid_unavailable")
+        return query_similar(embed(query_text), n_results, where)
+
+    lexical = index.search(query_text, max(n_results, FUSION_CANDIDATES), where)
+    if lexical.pop("confident"):
+        metrics.incr("retriever.keyword_fast_path")
+        result = {name: [rows[0][:n_results]] for name, rows in lexical.items()}
+        if len(result["ids"][0]) < n_results:
+            result = _fill_from_neighbours(result, n_results, where)
+    else:
+        vector = query_similar(embed(query_text), max(n_results, FUSION_CANDIDATES), where)
+        result = reciprocal_rank_fusion([vector, lexical], n_results)
+
+    cache.set(key, result)
+    return result
+
+
+def _fill_from_neighbours(result: dict, n_results: int, where: Optional[dict] = None) -> dict:
+    """
+    Pad a short keyword fast-path result with the local replica's nearest
+    neighbours of its top hit, searched with the hit's stored vector so
+    nothing is embedded. Padded documents have no query distance (None) and
+    no lexical score (0.0).
+    """
+    from local_index import get_local_index
+
+    index = get_local_index()
+    vector = index.embedding(result["ids"][0][0]) if index is not None else None
+    if vector is None:
+        return result
+
+    neighbours = index.query_similar(vector, n_results + len(result["ids"][0]), where)
+    seen = set(result["ids"][0])
+    rows = zip(neighbours["ids"][0], neighbours["documents"][0], neighbours["metadatas"][0])
+    for doc_id, document, metadata in rows:
+        if len(result["ids"][0]) >= n_results:
+            break
+        if doc_id in seen:
+            continue
+        result["ids"][0].append(doc_id)
+        result["documents"][0].append(document)
+        result["metadatas"][0].append(metadata)
+        result["distances"][0].append(None)
+        result["scores"][0].append(0.0)
+    return result
+
+
+def _query_backend(
+    query_embedding: List[float],
+    n_results: int = 4,
+    where: Optional[dict] = None,
+    include: Optional[List[str]] = None
+) -> dict:
+    from local_index import get_local_index
+
+    if RETRIEVAL_BACKEND == "local":
+        index = get_local_index()
+        if index is None:
+            raise Exception("Local index not found - run local_index.sync_local_index() first")
+        return index.query_similar(query_embedding, n_results, where, include)
+
+    try:
+        return _get_cloud_client().query_similar(query_embedding, n_results, where, include)
+    except Exception as e:
+        index = get_local_index()
+        if index is None:
+            raise
+        print(f"   ⚠️ Chroma Cloud query failed ({e}), using local index")
+        try:
+            return index.query_similar(query_embedding, n_results, where, include)
+        except Exception as local_error:
+            raise Exception(f"Chroma Cloud query failed ({e}) and the local index could not answer ({local_error})") from e
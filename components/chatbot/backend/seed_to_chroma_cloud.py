@@ -2,31 +2,72 @@
 Seed embeddings from FAQ PDF and Video tutorials to Chroma Cloud
 
 Run this ONCE to populate your Chroma Cloud database with embeddings.
-Uses HuggingFace Inference API (cloud-based, no local model needed).
+Uses HuggingFace Inference API by default (cloud-based, no local model needed);
+set EMBEDDING_BACKEND=onnx or sentence-transformers to embed locally on CPU.
 
 Usage:
-    python seed_to_chroma_cloud.py
+    python seed_to_chroma_cloud.py                # full rebuild
+    python seed_to_chroma_cloud.py --incremental  # only new/changed/stale docs
+    python seed_to_chroma_cloud.py --resume       # continue an interrupted run
+
+The seeder is a streaming pipeline (load/split -> embed -> upload) with a
+bounded number of batches in flight, so memory stays flat as the corpus grows.
+After every committed batch it writes a checkpoint; --resume skips everything
+up to the last checkpoint. Documents are upserted and stale IDs are deleted
+at the end, so the collection is never empty mid-run.
+
+Near-duplicate PDF chunks are merged before embedding (see dedup.py,
+DEDUP_THRESHOLD). Embeddings are cached on disk (see embedding_cache.py), so
+unchanged chunks never hit the HuggingFace API again.
+
+With EMBEDDING_REDUCED_DIMENSIONS set, the whole corpus is embedded first and
+a PCA projection is fitted on it (see projection.py). Nothing is uploaded if
+the projection's top-k recall is below REDUCTION_MIN_RECALL; otherwise
+documents are stored projected, and the projection is published for queries
+once every batch is stored. Changing the stored dimension recreates the
+collection. The chatbot edge function queries with full-size embeddings, so
+reduction also needs --allow-reduced (use a collection only the Python query
+path reads).
 
 Requirements:
     - CHROMA_API_KEY in .env
-    - HF_TOKEN in .env (get from https://huggingface.co/settings/tokens)
-    - FAQ PDF in ../data/faq.pdf
+    - HF_TOKEN in .env (get from https://huggingface.co/settings/tokens),
+      unless EMBEDDING_BACKEND is a local backend
+    - FAQ PDF in ../data/faq.pdf (or several PDFs via FAQ_PDF_PATHS)
     - Videos JSON in ../data/videos.json
 """
 
 import os
 import sys
-import time
 import json
-import requests
-from typing import List
+import time
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from loader import load_and_split_documents
-from config import EMBEDDING_MODEL, VIDEOS_PATH
-from chroma_cloud import add_documents, clear_collection, get_collection_count
+from config import (
+    CHROMA_DIR, EMBEDDING_BACKEND, EMBEDDING_MODEL, EMBEDDING_WORKERS, EMBEDDING_DIMENSIONS,
+    EMBEDDING_REDUCED_DIMENSIONS, REDUCTION_MIN_RECALL,
+)
+from embeddings import get_embedder, embed_batches, rate_limiter, EMBEDDING_BATCH_SIZE
+from chroma_cloud import (
+    upsert_documents_batched, get_collection_count, delete_documents, delete_collection, get_store,
+    CHROMA_ACCESS_SHARDING, SHARD_KEY, shard_collection_name,
+)
+from embedding_cache import EmbeddingCache, metadata_hash
+from records import iter_records
+from projection import (
+    Projection, topk_recall, get_projection, publish_projection, RECALL_K, PROJECTION_PATH,
+    PENDING_PROJECTION_PATH,
+)
+from query_cache import bump_collection_version
+from canonical_answers import refresh_answer_index
+import metrics
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -43,183 +84,371 @@ if not CHROMA_API_KEY:
     print("Add this to your components/chatbot/.env file")
     sys.exit(1)
 
-if not HF_TOKEN:
+if EMBEDDING_BACKEND == "http" and not HF_TOKEN:
     print("❌ Missing HF_TOKEN in .env")
     print("Get your token from: https://huggingface.co/settings/tokens")
     print("Add HF_TOKEN=hf_xxxxx to your components/chatbot/.env file")
     sys.exit(1)
 
+CHECKPOINT_PATH = CHROMA_DIR / "seed_checkpoint.json"
+
+# Embedding batches queued or running at once (bounds memory)
+MAX_IN_FLIGHT = EMBEDDING_WORKERS * 2
 
-def generate_embedding(text: str) -> List[float]:
+
+def fetch_existing_hashes():
     """
-    Generate embedding using HuggingFace Inference Providers API
-    Uses sentence-transformers/all-MiniLM-L6-v2 (384 dimensions)
-    New endpoint: router.huggingface.co
+    Everything already stored: document ID -> (metadata_hash, access_level).
+    A document found in more than one shard (a sharded upsert that was
+    interrupted before pruning the old shard) never counts as unchanged.
+
+    metadata_hash covers the text (via content_hash), the projection and
+    every other metadata field, so an edited video title or a shifted page
+    number counts as a change.
     """
-    # New HuggingFace router endpoint (as of 2025)
-    # Format: /hf-inference/models/{model_id}/pipeline/feature-extraction
-    api_url = f"https://router.huggingface.co/hf-inference/models/{EMBEDDING_MODEL}/pipeline/feature-extraction"
-    
-    headers = {
-        "Authorization": f"Bearer {HF_TOKEN}",
-        "Content-Type": "application/json"
-    }
-    
-    # Request with options for proper embedding output
-    payload = {
-        "inputs": text,
-        "options": {
-            "wait_for_model": True,
-            "use_cache": True
-        }
-    }
-    
-    response = requests.post(api_url, headers=headers, json=payload)
-    
-    if response.status_code == 503:
-        # Model is loading, wait and retry
-        print("      ⏳ Model loading, waiting...")
-        time.sleep(20)
-        response = requests.post(api_url, headers=headers, json=payload)
-    
-    if response.status_code != 200:
-        raise Exception(f"HuggingFace API error ({response.status_code}): {response.text}")
-    
-    result = response.json()
-    
-    # Handle different response formats
-    if isinstance(result, list):
-        if isinstance(result[0], list):
-            # Nested list - take mean pooling
-            import numpy as np
-            embedding = np.mean(result, axis=0).tolist()
-        else:
-            # Already a flat embedding
-            embedding = result
+    existing, locations = {}, {}
+    for page in get_store().iter_pages(include=["metadatas"]):
+        for doc_id, metadata in zip(page["ids"], page.get("metadatas") or []):
+            metadata = metadata or {}
+            existing[doc_id] = (metadata.get("metadata_hash"), metadata.get(SHARD_KEY))
+            locations.setdefault(doc_id, set()).add(metadata.get(SHARD_KEY))
+    for doc_id, levels in locations.items():
+        if len(levels) > 1:
+            existing[doc_id] = (existing[doc_id][0], None)  # never "unchanged"
+    return existing
+
+
+def record_state(record: dict) -> tuple:
+    """What fetch_existing_hashes() reports for an up-to-date copy of a record"""
+    metadata = record["metadata"]
+    return metadata["metadata_hash"], metadata.get(SHARD_KEY)
+
+
+def stored_dimensions():
+    """Dimension of the vectors already in the collection (None if it's empty)"""
+    for page in get_store().iter_pages(page_size=1, include=["embeddings"]):
+        if page["ids"]:
+            return len(page["embeddings"][0])
+    return None
+
+
+def fit_projection(records, embed_fn):
+    """
+    Embed every record at full size and pick the PCA projection to publish:
+    the current one if it still meets REDUCTION_MIN_RECALL on this corpus,
+    otherwise a fresh fit. Exits before anything is uploaded if neither does.
+
+    Returns (projection, embed_fn) where embed_fn projects the precomputed
+    full-size vectors instead of embedding again.
+    """
+    import numpy as np
+
+    texts = [r["document"] for r in records]
+    with metrics.span("seed.embed_full"):
+        matrix, failures = embed_batches(texts, EMBEDDING_BATCH_SIZE, EMBEDDING_WORKERS, embed_fn)
+    if failures:
+        print(f"\n❌ Could not embed {len(failures)} batches: {failures[0]['error']}")
+        sys.exit(1)
+
+    # A pending projection is left by an unfinished run; reusing it lets --resume continue
+    candidates = []
+    for label, existing in (("pending", Projection.load(PENDING_PROJECTION_PATH)), ("current", Projection.load(PROJECTION_PATH))):
+        if existing and existing.model == EMBEDDING_MODEL and existing.dimensions == EMBEDDING_REDUCED_DIMENSIONS:
+            candidates.append((label, existing))
+    candidates.append(("new", None))
+
+    for label, projection in candidates:
+        if projection is None:
+            try:
+                projection = Projection.fit(matrix, EMBEDDING_REDUCED_DIMENSIONS)
+            except Exception as e:
+                print(f"\n❌ Could not fit PCA projection: {e}")
+                sys.exit(1)
+        recall = topk_recall(matrix, projection)
+        print(f"   📉 {label.capitalize()} projection {EMBEDDING_DIMENSIONS} -> {projection.dimensions} dims: "
+              f"top-{RECALL_K} recall {recall:.3f} (minimum {REDUCTION_MIN_RECALL})")
+        if recall >= REDUCTION_MIN_RECALL:
+            break
     else:
-        raise Exception(f"Unexpected response format: {type(result)}")
-    
-    return embedding
+        print(f"\n❌ Refusing to publish: recall {recall:.3f} is below REDUCTION_MIN_RECALL={REDUCTION_MIN_RECALL}")
+        print(f"   Raise EMBEDDING_REDUCED_DIMENSIONS or unset it to store full-size vectors")
+        sys.exit(1)
 
+    vectors = dict(zip(texts, matrix))
+    return projection, lambda batch: projection.apply(np.stack([vectors[text] for text in batch]))
 
-def load_video_documents():
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def embed_stage(batches, embed_fn, max_workers: int = EMBEDDING_WORKERS, max_in_flight: int = MAX_IN_FLIGHT):
     """
-    Load video tutorial documents from videos.json
-    Returns list of dicts with content and metadata
+    Stage 2: embed - yields (batch, embeddings) in input order.
+
+    At most max_in_flight batches are queued or running at once. An embedding
+    failure is raised here, after the earlier batches have been yielded.
     """
-    if not VIDEOS_PATH.exists():
-        print(f"   ⚠️ Videos file not found: {VIDEOS_PATH}")
-        return []
-    
-    with open(VIDEOS_PATH, 'r', encoding='utf-8') as f:
-        videos = json.load(f)
-    
-    return videos
+    def timed_embed(texts):
+        with metrics.span("seed.embed_batch"):
+            return embed_fn(texts)
+
+    def wait(future):
+        # Time the upload stage spends blocked on embeddings
+        with metrics.span("seed.embed_wait"):
+            return future.result()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    pending = deque()
+    try:
+        for batch in batches:
+            pending.append((batch, pool.submit(timed_embed, [r["document"] for r in batch])))
+            if len(pending) >= max_in_flight:
+                done, future = pending.popleft()
+                yield done, wait(future)
+        while pending:
+            done, future = pending.popleft()
+            yield done, wait(future)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def load_checkpoint() -> dict:
+    try:
+        with open(CHECKPOINT_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_checkpoint(state: dict):
+    CHECKPOINT_PATH.parent.mkdir(parents=True, exist_ok=True)
+    state["updated_at"] = time.time()
+    tmp = CHECKPOINT_PATH.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+def clear_checkpoint():
+    if CHECKPOINT_PATH.exists():
+        CHECKPOINT_PATH.unlink()
+
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Seed FAQ + video embeddings to Chroma Cloud")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only embed/upsert new or changed documents (unchanged ones are skipped)",
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="Continue from the last checkpoint of an interrupted run",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Ignore the on-disk embedding cache",
+    )
+    parser.add_argument(
+        "--allow-reduced", action="store_true",
+        help="Store PCA-reduced vectors (EMBEDDING_REDUCED_DIMENSIONS) even though the chatbot "
+             "edge function queries with full-size embeddings",
+    )
+    parser.add_argument(
+        "--metrics-dir", type=Path,
+        help="Record per-stage timings/counters and write seed.jsonl + seed.prom here",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.metrics_dir:
+        metrics.enable()
+    try:
+        with metrics.span("seed.total"):
+            run(args)
+    finally:
+        if args.metrics_dir:
+            count = metrics.export(args.metrics_dir, prefix="seed")
+            print(f"📈 Wrote {count} metric events to {args.metrics_dir}")
+
+
+def resync_local_index():
+    """Re-sync an existing local replica after the stored vectors changed shape"""
+    from local_index import MANIFEST_FILE, LocalIndex, sync_local_index
+
+    replica = LocalIndex()
+    if not replica.exists():
+        return
+    print("\n💾 Projection changed, re-syncing the local index...")
+    try:
+        manifest = json.loads((replica.path / MANIFEST_FILE).read_text(encoding="utf-8"))
+        sync_local_index(dtype=manifest.get("dtype", "float32"))
+    except Exception as e:
+        print(f"   ⚠️ Could not re-sync the local index ({e}), run manage.py export")
+
+
+def run(args):
+    mode = "incremental" if args.incremental else "full"
 
-def main():
     print("🚀 Seeding FAQ + Video embeddings to Chroma Cloud...")
     print(f"   Using model: {EMBEDDING_MODEL}")
-    print(f"   Using HuggingFace Inference API (cloud)")
-    
-    # Load and split PDF documents
-    print("\n📄 Loading FAQ PDF...")
-    chunks = load_and_split_documents()
-    print(f"   Found {len(chunks)} PDF chunks")
-    
-    # Load video documents
-    print("\n🎬 Loading Video tutorials...")
-    videos = load_video_documents()
-    print(f"   Found {len(videos)} video documents")
-    
-    # Clear existing embeddings
-    print("\n🗑️ Clearing existing embeddings...")
-    clear_collection()
-    
-    # Prepare batch data
-    print("\n🧬 Generating embeddings via HuggingFace Inference API...")
-    documents = []
-    embeddings = []
-    metadatas = []
-    ids = []
-    
-    total_items = len(chunks) + len(videos)
-    current_item = 0
-    
-    # Process PDF chunks
-    for i, chunk in enumerate(chunks):
-        current_item += 1
-        try:
-            content = chunk.page_content
-            print(f"   [{current_item}/{total_items}] PDF: {content[:50]}...")
-            
-            # Generate embedding using HF Inference API
-            embedding = generate_embedding(content)
-            
-            documents.append(content)
-            embeddings.append(embedding)
-            metadatas.append({
-                "source": "faq.pdf",
-                "type": "text",
-                "page": chunk.metadata.get("page", 0),
-                "chunk_index": i,
-                "access_level": "public"  # FAQ is public product info (prompt handles topic restrictions)
-            })
-            ids.append(f"faq_chunk_{i}")
-            
-            # Rate limiting for HuggingFace free tier (avoid 429 errors)
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-            continue
-    
-    # Process video documents
-    for video in videos:
-        current_item += 1
-        try:
-            content = video["content"]
-            print(f"   [{current_item}/{total_items}] Video: {video['title'][:40]}...")
-            
-            # Generate embedding using HF Inference API
-            embedding = generate_embedding(content)
-            
-            documents.append(content)
-            embeddings.append(embedding)
-            metadatas.append({
-                "source": "videos.json",
-                "type": "video",
-                "video_id": video["id"],
-                "r2_file_name": video.get("r2_file_name", ""),
-                "video_title": video["title"],
-                "access_level": video.get("access_level", "public")  # Default to public for videos
-            })
-            ids.append(f"video_{video['id']}")
-            
-            # Rate limiting for HuggingFace free tier (avoid 429 errors)
-            time.sleep(0.5)
-            
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
-            continue
-    
-    if not documents:
-        print("\n❌ No documents were processed successfully!")
+    embedder = get_embedder()
+    if embedder.name == "http":
+        print(f"   Using HuggingFace Inference API (cloud)")
+    else:
+        print(f"   Using local {embedder.name} backend ({embedder.model_path})")
+    print(f"   Mode: {mode}, {EMBEDDING_BATCH_SIZE} docs per batch, {EMBEDDING_WORKERS} embedding workers")
+    if CHROMA_ACCESS_SHARDING:
+        store = get_store()
+        shards = ", ".join(shard_collection_name(level, store.collection) for level in store.access_levels)
+        print(f"   Sharded by {SHARD_KEY}: {shards}")
+
+    cache = None if args.no_cache else EmbeddingCache()
+    embed_fn = (lambda batch: cache.embed(batch, embedder.embed)) if cache else embedder.embed
+
+    # The edge function embeds queries at full size: a reduced collection
+    # would fail every live request on a dimension mismatch
+    if EMBEDDING_REDUCED_DIMENSIONS and not args.allow_reduced:
+        print(f"\n❌ EMBEDDING_REDUCED_DIMENSIONS={EMBEDDING_REDUCED_DIMENSIONS} would store reduced vectors "
+              f"in {get_store().collection}, but the chatbot edge function queries with "
+              f"{EMBEDDING_DIMENSIONS}-dim embeddings")
+        print("   Seed a collection only the Python query path uses (CHROMA_COLLECTION) and pass --allow-reduced")
         sys.exit(1)
-    
-    # Upload batch to Chroma Cloud
-    print(f"\n☁️ Uploading {len(documents)} documents to Chroma Cloud...")
+
+    records, projection = iter_records(), None
+    if EMBEDDING_REDUCED_DIMENSIONS:
+        print(f"\n📉 Embedding the corpus to fit a {EMBEDDING_REDUCED_DIMENSIONS}-dim PCA projection...")
+        records = list(records)
+        projection, embed_fn = fit_projection(records, embed_fn)
+        # Lets --incremental tell which documents were stored under another projection
+        for record in records:
+            record["metadata"]["projection"] = projection.id
+    projection_id = projection.id if projection else None
+
+    def new_state():
+        return {"mode": mode, "model": EMBEDDING_MODEL, "sharded": CHROMA_ACCESS_SHARDING,
+                "projection": projection_id, "completed": 0, "uploaded": 0, "fingerprint": None}
+
+    state = load_checkpoint() if args.resume else {}
+    if state and (state.get("mode") != mode or state.get("model") != EMBEDDING_MODEL
+                  or state.get("sharded", False) != CHROMA_ACCESS_SHARDING
+                  or state.get("projection") != projection_id):
+        print(f"   ⚠️ Checkpoint is for a different mode/model/layout/projection, starting over")
+        state = {}
+    if state:
+        print(f"   ⏩ Resuming after {state['completed']} records ({state['uploaded']} uploaded)")
+    else:
+        state = new_state()
+
+    print("\n🔍 Reading existing collection...")
+    existing = fetch_existing_hashes()
+    print(f"   Collection has {len(existing)} documents")
+
+    # Chroma fixes a collection's dimension on first insert
+    dimensions = projection.dimensions if projection else EMBEDDING_DIMENSIONS
+    current_dimensions = stored_dimensions()
+    if current_dimensions is not None and current_dimensions != dimensions:
+        print(f"   ⚠️ Collection stores {current_dimensions}-dim vectors, recreating it for {dimensions}-dim ones")
+        delete_collection()
+        existing, state = {}, new_state()
+    resume_from = state["completed"]
+
+    # Queries keep using the published projection until every batch is stored
+    # (publish_projection below); an interrupted run resumes with the pending one
+    if projection:
+        projection.save(PENDING_PROJECTION_PATH)
+
+    seen_ids = set()
+    fingerprint = hashlib.sha256()
+    skipped = {"resumed": 0, "unchanged": 0}
+
+    def pending_records():
+        """Stream records, skipping the checkpointed prefix and (incremental) unchanged docs"""
+        for position, record in enumerate(records):
+            seen_ids.add(record["id"])
+            record["metadata"]["metadata_hash"] = metadata_hash(record["metadata"])
+            fingerprint.update(f"{record['id']}:{record['metadata']['metadata_hash']}\n".encode("utf-8"))
+            record["position"] = position
+            record["fingerprint"] = fingerprint.hexdigest()
+
+            if position < resume_from:
+                skipped["resumed"] += 1
+                if position == resume_from - 1 and record["fingerprint"] != state["fingerprint"]:
+                    raise Exception("Corpus changed since the checkpoint - rerun without --resume")
+                continue
+            if args.incremental and existing.get(record["id"]) == record_state(record):
+                skipped["unchanged"] += 1
+                continue
+            yield record
+
+    print("\n🧬 Streaming load -> embed -> upload...")
     try:
-        count = add_documents(
-            documents=documents,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=ids
-        )
-        print(f"   ✅ Uploaded {count} documents")
+        for batch, embeddings in embed_stage(batched(pending_records(), EMBEDDING_BATCH_SIZE), embed_fn):
+            # Stage 3: upload
+            with metrics.span("seed.upload_batch"):
+                results = upsert_documents_batched(
+                    documents=[r["document"] for r in batch],
+                    embeddings=embeddings,
+                    metadatas=[r["metadata"] for r in batch],
+                    ids=[r["id"] for r in batch],
+                )
+            failed = [r for r in results if not r["ok"]]
+            if failed:
+                raise Exception(f"Upload failed: {failed[0]['error']}")
+
+            state["completed"] = batch[-1]["position"] + 1
+            state["fingerprint"] = batch[-1]["fingerprint"]
+            state["uploaded"] += len(batch)
+            save_checkpoint(state)
+            metrics.incr("seed.documents_uploaded", len(batch))
+            print(f"   ✅ [{state['completed']}] Uploaded {len(batch)} documents ({state['uploaded']} total)")
     except Exception as e:
-        print(f"   ❌ Upload error: {e}")
+        print(f"\n❌ Seeding stopped: {e}")
+        print(f"   Checkpoint saved after {state['completed']} records - rerun with --resume to continue")
         sys.exit(1)
+
+    if cache:
+        print(f"   💾 Embedding cache: {cache.hits} hits, {cache.misses} misses")
+    if rate_limiter.throttled:
+        print(f"   ⏳ Throttled {rate_limiter.throttled} times, settled at {rate_limiter.rate:.2f} req/s")
+    if skipped["resumed"] or skipped["unchanged"]:
+        print(f"   ⏩ Skipped {skipped['resumed']} checkpointed and {skipped['unchanged']} unchanged documents")
+
+    # Remove documents that no longer exist in the corpus
+    stale_ids = [doc_id for doc_id in existing if doc_id not in seen_ids]
+    if stale_ids:
+        print(f"\n🗑️ Deleting {len(stale_ids)} stale documents...")
+        try:
+            delete_documents(stale_ids)
+        except Exception as e:
+            print(f"   ❌ Delete error: {e}")
+            sys.exit(1)
+
+    # Every stored vector now matches the new projection (or full size): switch
+    # queries over, and drop cached results that point at stale documents
+    published = get_projection(PROJECTION_PATH)
+    publish_projection(projection, PROJECTION_PATH, PENDING_PROJECTION_PATH)
+    bump_collection_version()
+    clear_checkpoint()
+
+    # A local replica stored under the old projection can't answer projected queries
+    if (published.id if published else None) != projection_id:
+        resync_local_index()
+
+    # Otherwise the canonical answer index is skipped as stale until rebuilt
+    try:
+        answers = refresh_answer_index()
+        if answers:
+            print(f"   📌 Refreshed canonical answers for {answers.manifest['questions']} questions")
+    except Exception as e:
+        print(f"   ⚠️ Could not refresh the canonical answer index ({e}), run manage.py answers")
     
     # Verify
     final_count = get_collection_count()
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Backend modules import each other as top-level modules; the stand-in
+# servers live with the benchmarks
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR / "benchmarks"))
+sys.path.insert(0, str(BACKEND_DIR))
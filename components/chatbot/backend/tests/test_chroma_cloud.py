@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import chroma_cloud
+from chroma_cloud import ShardedChromaClient
+from config import EMBEDDING_DIMENSIONS
+from standin_servers import ChromaStandIn
+
+LEVELS = ("public", "authenticated")
+
+
+@pytest.fixture
+def chroma(monkeypatch):
+    monkeypatch.setattr(chroma_cloud, "CHROMA_API_KEY", "test")
+    server = ChromaStandIn().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def store(chroma):
+    client = ShardedChromaClient("c", LEVELS, api_base=chroma.api_base, max_retries=0)
+    yield client
+    client.close()
+
+
+def _vectors(count):
+    return np.random.default_rng(0).random((count, EMBEDDING_DIMENSIONS), dtype=np.float32)
+
+
+def _stored_ids(chroma):
+    return {
+        name: sorted(chroma.records[collection_id])
+        for name, collection_id in chroma.collections.items()
+        if chroma.records[collection_id]
+    }
+
+
+def test_import_removes_reclassified_document_from_its_old_shard(chroma, store, tmp_path):
+    ids = ["d0", "d1", "d2"]
+    vectors = _vectors(3)
+    store.upsert_documents_batched(
+        ["doc 0", "doc 1", "doc 2"], vectors,
+        [{"access_level": "authenticated"}, {"access_level": "public"}, {"access_level": "public"}], ids,
+    )
+    store.export_collection(tmp_path / "snapshot")
+
+    # d0 becomes public in the live store, then the snapshot is restored
+    store.upsert_documents_batched(["doc 0"], vectors[:1], [{"access_level": "public"}], ["d0"])
+    assert _stored_ids(chroma) == {"c_public": ["d0", "d1", "d2"]}
+
+    store.import_collection(tmp_path / "snapshot")
+
+    assert _stored_ids(chroma) == {"c_authenticated": ["d0"], "c_public": ["d1", "d2"]}
+    result = store.query_similar(vectors[0], n_results=3, where={"access_level": "public"})
+    assert "d0" not in result["ids"][0]
+
+
+def test_access_levels_intersect_with_the_where_filter(chroma, store):
+    vectors = _vectors(2)
+    store.upsert_documents_batched(
+        ["public doc", "private doc"], vectors,
+        [{"access_level": "public"}, {"access_level": "authenticated"}], ["d0", "d1"],
+    )
+
+    result = store.query_similar(vectors[1], n_results=2, where={"access_level": "public"}, access_levels=list(LEVELS))
+    assert result["ids"][0] == ["d0"]
+
+    with pytest.raises(Exception):
+        store.query_similar(vectors[1], where={"access_level": "public"}, access_levels=["authenticated"])
+
+
+def test_module_helpers_use_the_shards_when_sharding(chroma, store, monkeypatch):
+    monkeypatch.setattr(chroma_cloud, "CHROMA_ACCESS_SHARDING", True)
+    monkeypatch.setattr(chroma_cloud, "_sharded_client", store)
+
+    chroma_cloud.upsert_documents(["doc"], _vectors(1), [{"access_level": "authenticated"}], ["d0"])
+
+    assert _stored_ids(chroma) == {"c_authenticated": ["d0"]}
+    with pytest.raises(Exception):
+        chroma_cloud.get_or_create_collection()
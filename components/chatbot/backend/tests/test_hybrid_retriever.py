@@ -0,0 +1,91 @@
+import os
+
+import numpy as np
+import pytest
+
+import hybrid_retriever
+import local_index
+import query_cache
+import retriever
+from hybrid_retriever import BM25Index
+from local_index import LocalIndex
+
+PUBLIC = {"access_level": "public"}
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch):
+    ids = ["video_kyc", "faq_0", "faq_1", "faq_2", "faq_3", "faq_4"]
+    documents = [
+        "How to complete KYC verification",
+        "Trading tokens on the exchange",
+        "Withdrawing funds to your bank account",
+        "Depositing funds with a card",
+        "Internal settlement procedures",
+        "Internal risk controls",
+    ]
+    metadatas = [
+        {"access_level": "public"},
+        {"access_level": "public"},
+        {"access_level": "public"},
+        {"access_level": "public"},
+        {"access_level": "private"},
+        {"access_level": "private"},
+    ]
+    embeddings = [
+        _unit([1.0, 0.0, 0.0]),
+        _unit([0.2, 1.0, 0.0]),
+        _unit([0.9, 0.1, 0.0]),
+        _unit([0.5, 0.5, 0.5]),
+        _unit([1.0, 0.05, 0.0]),
+        _unit([0.95, 0.0, 0.1]),
+    ]
+    index = LocalIndex(tmp_path)
+    index.write(ids, documents, embeddings, metadatas)
+    index.load()
+
+    keywords = {"video_kyc": ["kyc"]}
+    monkeypatch.setattr(local_index, "get_local_index", lambda path=None: index)
+    monkeypatch.setattr(hybrid_retriever, "get_hybrid_index",
+                        lambda: BM25Index(index.ids, index.documents, index.metadatas, keywords))
+    monkeypatch.setattr(query_cache, "_cache", query_cache.QueryCache(version_file=None))
+    return index
+
+
+def _no_embedding(text):
+    raise AssertionError("the keyword fast path must not embed the query")
+
+
+def test_fast_path_fills_short_filtered_result_without_embedding(replica):
+    result = retriever.retrieve_hybrid("what is kyc", _no_embedding, n_results=4, where=PUBLIC)
+
+    ids = result["ids"][0]
+    assert ids[0] == "video_kyc"
+    assert len(ids) == 4
+    assert len(set(ids)) == 4
+    assert all(m["access_level"] == "public" for m in result["metadatas"][0])
+    # Padding is ranked by similarity to the keyword hit
+    assert ids[1] == "faq_1"
+    assert result["distances"][0] == [None] * 4
+
+
+
+def test_local_index_reloads_after_another_process_rewrites_it(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_index, "_index", None)
+    monkeypatch.setattr(local_index, "_index_mtime", None)
+
+    assert local_index.get_local_index(tmp_path) is None
+    LocalIndex(tmp_path).write(["a"], ["doc a"], [_unit([1.0, 0.0])], [{}])
+    assert local_index.get_local_index(tmp_path).ids == ["a"]
+
+    # A second writer (e.g. manage.py export) replaces the files on disk
+    LocalIndex(tmp_path).write(["a", "b"], ["doc a", "doc b"], [_unit([1.0, 0.0]), _unit([0.0, 1.0])], [{}, {}])
+    manifest = tmp_path / local_index.MANIFEST_FILE
+    stat = manifest.stat()
+    os.utime(manifest, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert local_index.get_local_index(tmp_path).ids == ["a", "b"]
@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+
+from local_index import LocalIndex
+
+
+def test_query_with_other_dimensions_reports_a_stale_replica(tmp_path):
+    index = LocalIndex(tmp_path)
+    index.write(["a", "b"], ["doc a", "doc b"], np.eye(2, 384, dtype=np.float32), [{}, {}])
+
+    assert index.query_similar(np.eye(1, 384, dtype=np.float32)[0], 1)["ids"] == [["a"]]
+    with pytest.raises(Exception, match="stale"):
+        index.query_similar(np.ones(128, dtype=np.float32), 1)
@@ -0,0 +1,74 @@
+"""
+On-disk layout shared by the local replica and collection snapshots
+
+A directory holds one or more .npy arrays (one row per record), a JSONL
+records table ({"id", "document", "metadata"} per line, same order as the
+rows) and a JSON manifest. Everything is written under temporary names and
+renamed, manifest last, so readers never see a half-written directory and a
+crashed write never leaves one that looks complete.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from vectors import to_matrix
+
+RECORDS_FILE = "records.jsonl"
+
+
+def record_matrix(embeddings, count: int) -> np.ndarray:
+    """to_matrix() with one row per record; no records still gives a 2-D (0, dimensions) matrix"""
+    matrix = to_matrix(embeddings)
+    if count:
+        return matrix.reshape(count, -1)
+    return matrix.reshape(0, matrix.shape[-1])
+
+
+def write_vector_files(
+    path: Path,
+    arrays: Dict[str, np.ndarray],
+    ids: List[str],
+    documents: List[str],
+    metadatas: List[dict],
+    manifest_file: str,
+    manifest: dict,
+):
+    """Write arrays (file name -> array), the records table and the manifest atomically"""
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    renames = []
+    for name, array in arrays.items():
+        tmp = path / f".{name}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        renames.append((tmp, path / name))
+
+    tmp_records = path / f".{RECORDS_FILE}.tmp"
+    with open(tmp_records, "w", encoding="utf-8") as f:
+        for doc_id, document, metadata in zip(ids, documents, metadatas):
+            f.write(json.dumps({"id": doc_id, "document": document, "metadata": metadata}, ensure_ascii=False) + "\n")
+    renames.append((tmp_records, path / RECORDS_FILE))
+
+    tmp_manifest = path / f".{manifest_file}.tmp"
+    tmp_manifest.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    renames.append((tmp_manifest, path / manifest_file))
+
+    for tmp, final in renames:
+        os.replace(tmp, final)
+
+
+def read_records(path: Path) -> Tuple[List[str], List[str], List[dict]]:
+    """Read the records table written by write_vector_files: (ids, documents, metadatas)"""
+    ids, documents, metadatas = [], [], []
+    with open(Path(path) / RECORDS_FILE, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            ids.append(record["id"])
+            documents.append(record["document"])
+            metadatas.append(record["metadata"])
+    return ids, documents, metadatas
@@ -0,0 +1,78 @@
+"""
+Compact embedding representation helpers
+
+Embeddings are kept as one contiguous float32 matrix end to end. For the local
+replica and snapshots they can optionally be stored quantized:
+
+- float16: half the size, upcast to float32 when scored
+- int8: a quarter of the size, symmetric per-row quantization with a float32
+  scale per row (score = (query @ int8_row) * scale)
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize each row (a 1-D vector is one row); zero rows stay zero"""
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def to_matrix(embeddings, dimensions: Optional[int] = None) -> np.ndarray:
+    """Convert embeddings (list of lists, list of arrays or array) to a C-contiguous float32 matrix"""
+    if isinstance(embeddings, np.ndarray):
+        matrix = embeddings.astype(np.float32, copy=False)
+    elif len(embeddings) == 0:
+        matrix = np.zeros((0, dimensions or 0), dtype=np.float32)
+    else:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    return np.ascontiguousarray(matrix)
+
+
+def quantize(matrix: np.ndarray, dtype: str = "float32") -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Quantize a float32 matrix for storage.
+
+    Returns (data, scales); scales is only set for int8.
+    """
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"Unsupported storage dtype: {dtype} (expected one of {STORAGE_DTYPES})")
+
+    matrix = to_matrix(matrix)
+
+    if dtype == "float32":
+        return matrix, None
+
+    if dtype == "float16":
+        return matrix.astype(np.float16), None
+
+    max_abs = np.abs(matrix).max(axis=1) if len(matrix) else np.zeros(0, dtype=np.float32)
+    scales = (max_abs / 127.0).astype(np.float32)
+    scales[scales == 0] = 1.0
+    data = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return data, scales
+
+
+def dequantize(data: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Inverse of quantize(), returns a float32 matrix"""
+    matrix = np.asarray(data, dtype=np.float32)
+    if scales is not None:
+        matrix = matrix * np.asarray(scales, dtype=np.float32)[:, None]
+    return matrix
+
+
+def scores(queries: np.ndarray, data: np.ndarray, scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """Dot-product scores of float32 queries against (possibly quantized) stored rows"""
+    if data.dtype == np.float32:
+        return queries @ data.T
+    result = queries @ data.T.astype(np.float32)
+    if scales is not None:
+        result *= np.asarray(scales, dtype=np.float32)[None, :]
+    return result
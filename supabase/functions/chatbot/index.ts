@@ -17,6 +17,9 @@ const R2_ACCESS_KEY_ID = Deno.env.get("R2_ACCESS_KEY_ID") || "";
 const R2_SECRET_ACCESS_KEY = Deno.env.get("R2_SECRET_ACCESS_KEY") || "";
 const R2_BUCKET_NAME = Deno.env.get("R2_BUCKET_NAME") || "sharematch-assets";
 
+// Chroma collection name -> ID, kept across requests served by a warm instance
+const chromaCollectionIds = new Map<string, string>();
+
 // Map topic IDs to R2 video file names
 const VIDEO_FILE_NAMES: Record<string, string> = {
   login: "Streamline Login Process With Sharematch.mp4",
@@ -440,6 +443,13 @@ serve(async (req) => {
     const chromaDatabase = Deno.env.get("CHROMA_DATABASE") || "Prod";
     const chromaCollection =
       Deno.env.get("CHROMA_COLLECTION") || "sharematch_faq";
+    const chromaAccessSharding = ["1", "true", "yes"].includes(
+      (Deno.env.get("CHROMA_ACCESS_SHARDING") || "").toLowerCase(),
+    );
+    // Shards are <collection>_<level>, one per level (same default as the seeder)
+    const chromaAccessLevels = (Deno.env.get("CHROMA_ACCESS_LEVELS") || "public,authenticated")
+      .split(",")
+      .filter((level) => level);
 
     console.log("=== CONFIG CHECK ===");
     console.log("GROQ_API_KEY:", groqApiKey ? "✓ SET" : "✗ MISSING");
@@ -448,6 +458,8 @@ serve(async (req) => {
     console.log("CHROMA_TENANT:", chromaTenant || "✗ MISSING");
     console.log("CHROMA_DATABASE:", chromaDatabase);
     console.log("CHROMA_COLLECTION:", chromaCollection);
+    console.log("CHROMA_ACCESS_SHARDING:", chromaAccessSharding);
+    console.log("CHROMA_ACCESS_LEVELS:", chromaAccessLevels.join(", "));
     console.log("====================");
 
     if (!groqApiKey) throw new Error("GROQ_API_KEY not configured");
@@ -579,60 +591,128 @@ serve(async (req) => {
       "X-Chroma-Token": chromaApiKey,
     };
 
-    // Get collection ID
-    const collectionUrl = `https://api.trychroma.com/api/v2/tenants/${chromaTenant}/databases/${chromaDatabase}/collections/${chromaCollection}`;
+    const databaseUrl = `https://api.trychroma.com/api/v2/tenants/${chromaTenant}/databases/${chromaDatabase}`;
 
-    const collectionsResponse = await fetch(collectionUrl, {
-      method: "GET",
-      headers: chromaHeaders,
-    });
+    // Collection ID from the cache or a lookup; null if the collection doesn't exist
+    const getCollectionId = async (collectionName: string): Promise<string | null> => {
+      const cached = chromaCollectionIds.get(collectionName);
+      if (cached) return cached;
 
-    if (!collectionsResponse.ok) {
-      const errText = await collectionsResponse.text();
-      console.error("✗ Collection error:", collectionsResponse.status, errText);
-      throw new Error(`Collection not found: ${errText}`);
-    }
+      const collectionsResponse = await fetch(
+        `${databaseUrl}/collections/${collectionName}`,
+        { method: "GET", headers: chromaHeaders },
+      );
 
-    const collectionData = await collectionsResponse.json();
-    console.log("✓ Collection found, ID:", collectionData.id);
-
-    // Query the collection with access level filtering
-    const queryUrl = `https://api.trychroma.com/api/v2/tenants/${chromaTenant}/databases/${chromaDatabase}/collections/${collectionData.id}/query`;
-
-    // Build query body with optional access_level filter for unauthenticated users
-    const queryBody: {
-      query_embeddings: number[][];
-      n_results: number;
-      include: string[];
-      where?: { access_level: { $eq: string } };
-    } = {
-      query_embeddings: [queryEmbedding],
-      n_results: 4,
-      include: ["documents"],
+      if (collectionsResponse.status === 404) {
+        await collectionsResponse.body?.cancel();
+        return null;
+      }
+
+      if (!collectionsResponse.ok) {
+        const errText = await collectionsResponse.text();
+        console.error("✗ Collection error:", collectionsResponse.status, errText);
+        throw new Error(`Collection lookup failed: ${errText}`);
+      }
+
+      const collectionData = await collectionsResponse.json();
+      console.log("✓ Collection found, ID:", collectionData.id);
+      chromaCollectionIds.set(collectionName, collectionData.id);
+      return collectionData.id;
     };
 
-    // Filter to only public documents for unauthenticated users
-    if (!isAuthenticated) {
-      queryBody.where = { access_level: { $eq: "public" } };
-      console.log("🔓 Filtering RAG to public documents only");
-    } else {
-      console.log("🔐 RAG has access to all documents");
-    }
+    // Query one collection, returns its documents and distances (null if it doesn't exist)
+    const queryCollection = async (
+      collectionName: string,
+      where?: { access_level: { $eq: string } },
+    ): Promise<{ documents: string[]; distances: number[] } | null> => {
+      const queryBody: {
+        query_embeddings: number[][];
+        n_results: number;
+        include: string[];
+        where?: { access_level: { $eq: string } };
+      } = {
+        query_embeddings: [queryEmbedding],
+        n_results: 4,
+        include: ["documents", "distances"],
+      };
+      if (where) queryBody.where = where;
+
+      // A cached ID goes stale when a reseed recreates the collection: look it up once more
+      for (let attempt = 0; attempt < 2; attempt++) {
+        const collectionId = await getCollectionId(collectionName);
+        if (!collectionId) return null;
+
+        const queryResponse = await fetch(
+          `${databaseUrl}/collections/${collectionId}/query`,
+          { method: "POST", headers: chromaHeaders, body: JSON.stringify(queryBody) },
+        );
+
+        if (queryResponse.status === 404 && attempt === 0) {
+          await queryResponse.body?.cancel();
+          chromaCollectionIds.delete(collectionName);
+          continue;
+        }
 
-    const queryResponse = await fetch(queryUrl, {
-      method: "POST",
-      headers: chromaHeaders,
-      body: JSON.stringify(queryBody),
-    });
+        if (!queryResponse.ok) {
+          const errText = await queryResponse.text();
+          console.error("✗ Query error:", queryResponse.status, errText);
+          throw new Error(`Query failed: ${errText}`);
+        }
 
-    if (!queryResponse.ok) {
-      const errText = await queryResponse.text();
-      console.error("✗ Query error:", queryResponse.status, errText);
-      throw new Error(`Query failed: ${errText}`);
-    }
+        const queryData = await queryResponse.json();
+        return {
+          documents: queryData.documents?.[0] || [],
+          distances: queryData.distances?.[0] || [],
+        };
+      }
+      return null;
+    };
 
-    const queryData = await queryResponse.json();
-    const documents = queryData.documents?.[0] || [];
+    let documents: string[];
+    if (chromaAccessSharding) {
+      // One collection per access level (<collection>_<level>): anonymous
+      // users only hit the smaller public shard, with no filter at all
+      const levels = isAuthenticated
+        ? chromaAccessLevels
+        : chromaAccessLevels.filter((level) => level === "public");
+      console.log(`🔀 Querying access-level shards: ${levels.join(", ")}`);
+      const shardResults = await Promise.all(
+        levels.map((level) => queryCollection(`${chromaCollection}_${level}`)),
+      );
+      shardResults.forEach((result, i) => {
+        if (!result) console.warn(`⚠️ Shard ${chromaCollection}_${levels[i]} not found, skipping`);
+      });
+      if (shardResults.every((result) => !result)) {
+        const shardNames = levels.map((level) => `${chromaCollection}_${level}`).join(", ");
+        console.error("✗ No shard collection found:", shardNames);
+        throw new Error(`Collection not found: ${shardNames}`);
+      }
+      documents = shardResults
+        .flatMap((result) => {
+          if (!result) return [];
+          const { distances } = result;
+          return result.documents.map((document, i) => ({ document, distance: distances[i] }));
+        })
+        .sort((a, b) => a.distance - b.distance)
+        .slice(0, 4)
+        .map((hit) => hit.document);
+    } else {
+      // Filter to only public documents for unauthenticated users
+      if (!isAuthenticated) {
+        console.log("🔓 Filtering RAG to public documents only");
+      } else {
+        console.log("🔐 RAG has access to all documents");
+      }
+      const result = await queryCollection(
+        chromaCollection,
+        isAuthenticated ? undefined : { access_level: { $eq: "public" } },
+      );
+      if (!result) {
+        console.error("✗ Collection not found:", chromaCollection);
+        throw new Error(`Collection not found: ${chromaCollection}`);
+      }
+      documents = result.documents;
+    }
 
     console.log("✓ Found", documents.length, "documents");
 